@@ -0,0 +1,161 @@
+import math
+from typing import Dict, Optional
+
+import numpy as np
+
+# Numba is optional: without it the kernels run as plain Python functions
+try:
+    from numba import njit
+except ImportError:
+    def njit(*args, **kwargs):
+        """No-op stand-in for numba.njit"""
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
+
+
+def as_float(value) -> float:
+    """Convert a metric value to float, using NaN as the missing-value sentinel"""
+    if value is None:
+        return math.nan
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return math.nan
+
+
+# Ratios reported either as decimals (0.15) or percentages (15), and the
+# percent-valued keys FundamentalAgent derives from them at ingestion
+PERCENT_FIELDS = (
+    ('roe', 'roe_pct'),
+    ('profit_margin', 'margin_pct'),
+    ('revenue_growth', 'growth_pct')
+)
+
+
+def to_percent(value) -> Optional[float]:
+    """Convert a decimal ratio to percent; values >= 1 are taken as percentages already"""
+    value = as_float(value)
+    if math.isnan(value):
+        return None
+    return value * 100 if value < 1 else value
+
+
+def with_percent_fields(data: Dict) -> Dict:
+    """Return data with any missing *_pct keys derived from the raw ratios"""
+    missing = {pct: to_percent(data.get(raw)) for raw, pct in PERCENT_FIELDS if pct not in data}
+    return {**data, **missing} if missing else data
+
+
+# Threshold tables: each *_BINS array is searched with np.searchsorted and the
+# resulting index selects the score contribution from the matching *_PTS array.
+# side='right' reproduces a strict '<' ladder, side='left' a strict '>' ladder.
+PE_BINS = np.array([15.0, 20.0, 25.0, 35.0])
+PE_PTS = np.array([25.0, 20.0, 15.0, 5.0, -10.0])
+PE_SIDE = 'right'
+
+PB_BINS = np.array([1.5, 3.0, 5.0])
+PB_PTS = np.array([15.0, 10.0, 5.0, -5.0])
+PB_SIDE = 'right'
+
+ROE_BINS = np.array([5.0, 10.0, 15.0, 20.0])
+ROE_PTS = np.array([-5.0, 5.0, 10.0, 15.0, 20.0])
+ROE_SIDE = 'left'
+
+MARGIN_BINS = np.array([0.0, 5.0, 10.0, 20.0])
+MARGIN_PTS = np.array([-5.0, 2.0, 4.0, 7.0, 10.0])
+MARGIN_SIDE = 'left'
+
+DE_BINS = np.array([0.3, 0.6, 1.0])
+DE_PTS = np.array([10.0, 7.0, 3.0, -5.0])
+DE_SIDE = 'right'
+
+# Lowest edge is nudged below -10 so that only growth < -10% is penalised
+GROWTH_BINS = np.array([np.nextafter(-10.0, -np.inf), 10.0, 20.0])
+GROWTH_PTS = np.array([-5.0, 0.0, 3.0, 5.0])
+GROWTH_SIDE = 'left'
+
+ARTICLE_BINS = np.array([1.0, 2.0, 5.0, 10.0])
+ARTICLE_PTS = np.array([0.0, 5.0, 10.0, 15.0, 20.0])
+ARTICLE_SIDE = 'right'
+
+RATIO_BINS = np.array([0.2, 0.4, 0.6, 0.8])
+RATIO_PTS = np.array([-15.0, -5.0, 5.0, 15.0, 20.0])
+RATIO_SIDE = 'right'
+
+VOLATILITY_BINS = np.array([0.3, 0.5])
+VOLATILITY_PTS = np.array([0.0, -5.0, -10.0])
+VOLATILITY_SIDE = 'left'
+
+
+# NOTE: fastmath is deliberately left off - it lets LLVM assume no NaNs,
+# which would break the math.isnan() checks on the missing-value sentinel.
+@njit(cache=True)
+def fundamental_score(pe, pb, roe_pct, margin_pct, de, growth_pct):
+    """Fundamental score (0-100) from ratios (ROE/margin/growth in percent), NaN meaning unavailable"""
+    score = 50.0  # Start with neutral score
+
+    # PE Ratio scoring (25 points max)
+    if not math.isnan(pe) and pe > 0:
+        score += PE_PTS[np.searchsorted(PE_BINS, pe, side='right')]
+
+    # PB Ratio scoring (15 points max)
+    if not math.isnan(pb) and pb > 0:
+        score += PB_PTS[np.searchsorted(PB_BINS, pb, side='right')]
+
+    # ROE scoring (20 points max)
+    if not math.isnan(roe_pct):
+        score += ROE_PTS[np.searchsorted(ROE_BINS, roe_pct, side='left')]
+
+    # Profit Margin scoring (10 points max)
+    if not math.isnan(margin_pct):
+        score += MARGIN_PTS[np.searchsorted(MARGIN_BINS, margin_pct, side='left')]
+
+    # Debt to Equity scoring (10 points max)
+    if not math.isnan(de):
+        score += DE_PTS[np.searchsorted(DE_BINS, de, side='right')]
+
+    # Revenue growth (bonus points)
+    if not math.isnan(growth_pct):
+        score += GROWTH_PTS[np.searchsorted(GROWTH_BINS, growth_pct, side='left')]
+
+    # Ensure score is within bounds
+    return max(0.0, min(100.0, score))
+
+
+@njit(cache=True)
+def sentiment_score(avg_sentiment, total_articles, positive_count, negative_count, volatility):
+    """Sentiment score (0-100) from news metrics, NaN meaning unavailable"""
+    score = 50.0
+
+    # Average sentiment scoring (40 points max)
+    if not math.isnan(avg_sentiment):
+        # Convert VADER score (-1 to 1) to 0-40 point scale
+        sentiment_points = (avg_sentiment + 1) * 20  # Scale to 0-40
+        score += sentiment_points - 20  # Adjust so 0 sentiment = no change
+
+    # Article count scoring (20 points max)
+    if not math.isnan(total_articles):
+        score += ARTICLE_PTS[np.searchsorted(ARTICLE_BINS, total_articles, side='right')]
+
+    # Positive vs negative ratio (20 points max)
+    total_sentiment_articles = positive_count + negative_count
+    if total_sentiment_articles > 0:
+        positive_ratio = positive_count / total_sentiment_articles
+        score += RATIO_PTS[np.searchsorted(RATIO_BINS, positive_ratio, side='right')]
+
+    # Sentiment volatility penalty (up to -10 points)
+    if not math.isnan(volatility):
+        score += VOLATILITY_PTS[np.searchsorted(VOLATILITY_BINS, volatility, side='left')]
+
+    # Ensure score is within bounds
+    return max(0.0, min(100.0, score))
+
+
+@njit(cache=True)
+def weighted_scores(fundamental_scores, sentiment_scores, fundamental_weight, sentiment_weight):
+    """Overall scores for a portfolio: the weighted sum of the component score arrays"""
+    out = np.empty(fundamental_scores.shape[0])
+    for i in range(fundamental_scores.shape[0]):
+        out[i] = fundamental_scores[i] * fundamental_weight + sentiment_scores[i] * sentiment_weight
+    return out
@@ -1,16 +1,106 @@
 import numpy as np
-from typing import Dict, List, Optional
+from typing import Dict, Final, List, NamedTuple, Optional, Tuple
+import math
 import time
+from bisect import bisect_right
+from concurrent.futures import ThreadPoolExecutor
+from operator import itemgetter
+from types import MappingProxyType
+
+from agents import _score_kernels as kernels
+from agents._score_kernels import as_float, fundamental_score, sentiment_score, with_percent_fields
+
+# Metric fields read by the scoring kernels, in kernel argument order
+# (ROE, margin and growth are the percent keys derived by with_percent_fields)
+_FUND_FIELDS = ('pe_ratio', 'pb_ratio', 'roe_pct', 'margin_pct', 'debt_to_equity', 'growth_pct')
+_SENT_FIELDS = ('avg_sentiment', 'total_articles', 'positive_count', 'negative_count', 'sentiment_volatility')
+
+# Defaults merged under the input dicts so a single itemgetter call never misses a key
+_FUND_DEFAULTS = MappingProxyType(dict.fromkeys(_FUND_FIELDS))
+_SENT_DEFAULTS = MappingProxyType({
+    'avg_sentiment': 0.0,
+    'total_articles': 0,
+    'positive_count': 0,
+    'negative_count': 0,
+    'sentiment_volatility': 0.0
+})
+
+# Keys of the result dict built by AggregatorAgent._build_result, in order
+_RESULT_KEYS = (
+    'ticker', 'company_name', 'overall_score', 'fundamental_score', 'sentiment_score',
+    'recommendation', 'reasoning', 'weights_used', 'analysis_timestamp',
+    'current_price', 'market_cap', 'pe_ratio', 'pb_ratio', 'roe',
+    'avg_sentiment', 'positive_count', 'negative_count', 'total_articles',
+    'fundamental_quality', 'sentiment_quality'
+)
+
+# Metrics copied into the result for display, with their fallbacks
+_DISPLAY_FUND_DEFAULTS = MappingProxyType({
+    'current_price': 'N/A',
+    'market_cap': 'N/A',
+    'pe_ratio': 'N/A',
+    'pb_ratio': 'N/A',
+    'roe': 'N/A',
+    'data_quality': 'unknown'
+})
+_DISPLAY_SENT_DEFAULTS = MappingProxyType({
+    'avg_sentiment': 'N/A',
+    'positive_count': 0,
+    'negative_count': 0,
+    'total_articles': 0
+})
+_DISPLAY_FUND_KEYS = itemgetter(*_DISPLAY_FUND_DEFAULTS)
+_DISPLAY_SENT_KEYS = itemgetter(*_DISPLAY_SENT_DEFAULTS)
+
+class RecommendationThresholds(NamedTuple):
+    """Overall score cut-offs for BUY/HOLD/SELL"""
+    buy: int = 70         # Score >= 70 = BUY
+    hold_upper: int = 40  # Score 40-69 = HOLD
+    sell: int = 40        # Score < 40 = SELL
+
+RECOMMENDATION_THRESHOLDS: Final = RecommendationThresholds()
+
+_FUND_KEYS = itemgetter(*_FUND_FIELDS)
+_SENT_KEYS = itemgetter(*_SENT_FIELDS)
+_REASONING_FUND_KEYS = itemgetter('pe_ratio', 'roe_pct', 'debt_to_equity')
 
 class AggregatorAgent:
     """Agent responsible for aggregating fundamental and sentiment analysis"""
     
+    # All configuration lives on the class; instances carry no per-instance state
+    __slots__ = ()
+    
+    # Reasoning fragments, indexed with bisect_right over the matching bins.
+    # Strict '>' thresholds are nudged up one ulp so bisect_right keeps them exclusive.
+    _OVERALL_BINS = (40, 60, 80)
+    _OVERALL_MSGS = (
+        "Weak overall performance",
+        "Mixed performance signals",
+        "Good overall performance",
+        "Strong overall performance"
+    )
+    _FUNDAMENTAL_BINS = (50, 70)
+    _FUNDAMENTAL_MSGS = ("weak fundamentals", "decent fundamentals", "strong fundamentals")
+    _PE_BINS = (15, math.nextafter(30, math.inf))
+    _PE_MSGS = ("attractive valuation", None, "high valuation")
+    _ROE_BINS = (5, math.nextafter(20, math.inf))
+    _ROE_MSGS = ("low returns on equity", None, "excellent returns on equity")
+    _SENTIMENT_BINS = (50, 70)
+    _SENTIMENT_MSGS = ("negative market sentiment", "neutral market sentiment", "positive market sentiment")
+    _ARTICLES_BINS = (2, 10)
+    _ARTICLES_MSGS = ("limited news coverage", None, "good news coverage")
+    _DEBT_BINS = (math.nextafter(1.0, math.inf),)
+    _DEBT_MSGS = (None, "high debt levels")
+    
+    recommendation_thresholds = RECOMMENDATION_THRESHOLDS
+    _REC_BINS = (RECOMMENDATION_THRESHOLDS.hold_upper, RECOMMENDATION_THRESHOLDS.buy)
+    _REC_LABELS = ('SELL', 'HOLD', 'BUY')
+    
     def __init__(self):
-        self.recommendation_thresholds = {
-            'buy': 70,      # Score >= 70 = BUY
-            'hold_upper': 40, # Score 40-69 = HOLD
-            'sell': 40      # Score < 40 = SELL
-        }
+        # Warm up the score kernels so the JIT compile cost isn't paid mid-analysis
+        fundamental_score(20.0, 2.0, 0.15, 0.1, 0.5, 0.1)
+        sentiment_score(0.0, 1.0, 1.0, 0.0, 0.0)
+        kernels.weighted_scores(np.zeros(1), np.zeros(1), 0.5, 0.5)
     
     def aggregate_scores(
         self, 
@@ -38,159 +128,118 @@ class AggregatorAgent:
             Dictionary with aggregated analysis and recommendation
         """
         try:
-            # Normalize weights to ensure they sum to 1
-            total_weight = fundamental_weight + sentiment_weight
-            if total_weight > 0:
-                fundamental_weight = fundamental_weight / total_weight
-                sentiment_weight = sentiment_weight / total_weight
-            else:
-                fundamental_weight = sentiment_weight = 0.5
+            fundamental_weight, sentiment_weight = self._normalize_weights(
+                fundamental_weight, sentiment_weight
+            )
             
             # Calculate individual scores
             fundamental_score = self._calculate_fundamental_score(fundamental_data)
             sentiment_score = self._calculate_sentiment_score(sentiment_data)
             
-            # Calculate weighted overall score
-            overall_score = (
-                fundamental_score * fundamental_weight + 
-                sentiment_score * sentiment_weight
+            return self._build_result(
+                ticker,
+                company_name,
+                fundamental_data,
+                sentiment_data,
+                fundamental_score,
+                sentiment_score,
+                fundamental_weight,
+                sentiment_weight
             )
             
-            # Generate recommendation
-            recommendation = self._generate_recommendation(overall_score)
-            
-            # Create reasoning
-            reasoning = self._generate_reasoning(
-                fundamental_score, 
-                sentiment_score, 
-                overall_score, 
-                fundamental_data, 
-                sentiment_data
-            )
-            
-            # Compile result
-            result = {
-                'ticker': ticker,
-                'company_name': company_name,
-                'overall_score': round(overall_score, 1),
-                'fundamental_score': round(fundamental_score, 1),
-                'sentiment_score': round(sentiment_score, 1),
-                'recommendation': recommendation,
-                'reasoning': reasoning,
-                'weights_used': {
-                    'fundamental': round(fundamental_weight * 100, 1),
-                    'sentiment': round(sentiment_weight * 100, 1)
-                },
-                'analysis_timestamp': time.time(),
-                
-                # Include key metrics for display
-                'current_price': fundamental_data.get('current_price', 'N/A'),
-                'market_cap': fundamental_data.get('market_cap', 'N/A'),
-                'pe_ratio': fundamental_data.get('pe_ratio', 'N/A'),
-                'pb_ratio': fundamental_data.get('pb_ratio', 'N/A'),
-                'roe': fundamental_data.get('roe', 'N/A'),
-                'avg_sentiment': sentiment_data.get('avg_sentiment', 'N/A'),
-                'positive_count': sentiment_data.get('positive_count', 0),
-                'negative_count': sentiment_data.get('negative_count', 0),
-                'total_articles': sentiment_data.get('total_articles', 0),
-                
-                # Data quality indicators
-                'fundamental_quality': fundamental_data.get('data_quality', 'unknown'),
-                'sentiment_quality': 'good' if sentiment_data.get('total_articles', 0) > 0 else 'poor'
-            }
-            
-            return result
-            
         except Exception as e:
             print(f"Error aggregating scores for {ticker}: {e}")
             return self._get_error_result(ticker, company_name, str(e))
     
+    def _normalize_weights(self, fundamental_weight: float, sentiment_weight: float) -> Tuple[float, float]:
+        """Normalize weights to ensure they sum to 1"""
+        total_weight = fundamental_weight + sentiment_weight
+        if total_weight > 0:
+            return fundamental_weight / total_weight, sentiment_weight / total_weight
+        return 0.5, 0.5
+    
+    def _build_result(
+        self,
+        ticker: str,
+        company_name: str,
+        fundamental_data: Dict,
+        sentiment_data: Dict,
+        fundamental_score: float,
+        sentiment_score: float,
+        fundamental_weight: float,
+        sentiment_weight: float,
+        analysis_timestamp: Optional[float] = None,
+        overall_score: Optional[float] = None
+    ) -> Dict:
+        """Combine component scores into the final result dictionary"""
+        # Calculate weighted overall score (batch callers pass it precomputed)
+        if overall_score is None:
+            overall_score = (
+                fundamental_score * fundamental_weight + 
+                sentiment_score * sentiment_weight
+            )
+        
+        # Generate recommendation
+        recommendation = self._generate_recommendation(overall_score)
+        
+        # Create reasoning
+        reasoning = self._generate_reasoning(
+            fundamental_score, 
+            sentiment_score, 
+            overall_score, 
+            fundamental_data, 
+            sentiment_data
+        )
+        
+        # Display metrics, pulled with one lookup per source dict
+        current_price, market_cap, pe_ratio, pb_ratio, roe, data_quality = _DISPLAY_FUND_KEYS(
+            {**_DISPLAY_FUND_DEFAULTS, **fundamental_data}
+        )
+        avg_sentiment, positive_count, negative_count, total_articles = _DISPLAY_SENT_KEYS(
+            {**_DISPLAY_SENT_DEFAULTS, **sentiment_data}
+        )
+        
+        # Compile result (values in _RESULT_KEYS order)
+        return dict(zip(_RESULT_KEYS, (
+            ticker,
+            company_name,
+            round(overall_score, 1),
+            round(fundamental_score, 1),
+            round(sentiment_score, 1),
+            recommendation,
+            reasoning,
+            {
+                'fundamental': round(fundamental_weight * 100, 1),
+                'sentiment': round(sentiment_weight * 100, 1)
+            },
+            analysis_timestamp if analysis_timestamp is not None else time.time(),
+            
+            # Include key metrics for display
+            current_price,
+            market_cap,
+            pe_ratio,
+            pb_ratio,
+            roe,
+            avg_sentiment,
+            positive_count,
+            negative_count,
+            total_articles,
+            
+            # Data quality indicators
+            data_quality,
+            'good' if total_articles > 0 else 'poor'
+        )))
+    
     def _calculate_fundamental_score(self, fundamental_data: Dict) -> float:
         """Calculate fundamental analysis score (0-100)"""
         try:
-            score = 50.0  # Start with neutral score
-            
-            # PE Ratio scoring (25 points max)
-            pe_ratio = fundamental_data.get('pe_ratio')
-            if pe_ratio is not None and pe_ratio > 0:
-                if pe_ratio < 15:
-                    score += 25  # Excellent valuation
-                elif pe_ratio < 20:
-                    score += 20  # Good valuation
-                elif pe_ratio < 25:
-                    score += 15  # Fair valuation
-                elif pe_ratio < 35:
-                    score += 5   # High but acceptable
-                else:
-                    score -= 10  # Overvalued
-            
-            # PB Ratio scoring (15 points max)
-            pb_ratio = fundamental_data.get('pb_ratio')
-            if pb_ratio is not None and pb_ratio > 0:
-                if pb_ratio < 1.5:
-                    score += 15  # Excellent book value
-                elif pb_ratio < 3:
-                    score += 10  # Good book value
-                elif pb_ratio < 5:
-                    score += 5   # Fair book value
-                else:
-                    score -= 5   # High book value
-            
-            # ROE scoring (20 points max)
-            roe = fundamental_data.get('roe')
-            if roe is not None:
-                roe_percent = roe * 100 if roe < 1 else roe  # Handle decimal vs percentage
-                if roe_percent > 20:
-                    score += 20  # Excellent returns
-                elif roe_percent > 15:
-                    score += 15  # Good returns
-                elif roe_percent > 10:
-                    score += 10  # Fair returns
-                elif roe_percent > 5:
-                    score += 5   # Low returns
-                else:
-                    score -= 5   # Poor returns
-            
-            # Profit Margin scoring (10 points max)
-            profit_margin = fundamental_data.get('profit_margin')
-            if profit_margin is not None:
-                margin_percent = profit_margin * 100 if profit_margin < 1 else profit_margin
-                if margin_percent > 20:
-                    score += 10
-                elif margin_percent > 10:
-                    score += 7
-                elif margin_percent > 5:
-                    score += 4
-                elif margin_percent > 0:
-                    score += 2
-                else:
-                    score -= 5
-            
-            # Debt to Equity scoring (10 points max)
-            debt_to_equity = fundamental_data.get('debt_to_equity')
-            if debt_to_equity is not None:
-                if debt_to_equity < 0.3:
-                    score += 10  # Low debt
-                elif debt_to_equity < 0.6:
-                    score += 7   # Moderate debt
-                elif debt_to_equity < 1.0:
-                    score += 3   # Higher debt
-                else:
-                    score -= 5   # High debt
-            
-            # Revenue growth (bonus points)
-            revenue_growth = fundamental_data.get('revenue_growth')
-            if revenue_growth is not None:
-                growth_percent = revenue_growth * 100 if revenue_growth < 1 else revenue_growth
-                if growth_percent > 20:
-                    score += 5
-                elif growth_percent > 10:
-                    score += 3
-                elif growth_percent < -10:
-                    score -= 5
-            
-            # Ensure score is within bounds
-            return max(0, min(100, score))
+            pe, pb, roe_pct, margin_pct, de, growth_pct = _FUND_KEYS(
+                {**_FUND_DEFAULTS, **with_percent_fields(fundamental_data)}
+            )
+            return float(fundamental_score(
+                as_float(pe), as_float(pb), as_float(roe_pct),
+                as_float(margin_pct), as_float(de), as_float(growth_pct)
+            ))
             
         except Exception as e:
             print(f"Error calculating fundamental score: {e}")
@@ -199,55 +248,11 @@ class AggregatorAgent:
     def _calculate_sentiment_score(self, sentiment_data: Dict) -> float:
         """Calculate sentiment analysis score (0-100)"""
         try:
-            # Base score
-            score = 50.0
-            
-            # Average sentiment scoring (40 points max)
-            avg_sentiment = sentiment_data.get('avg_sentiment', 0.0)
-            if avg_sentiment is not None:
-                # Convert VADER score (-1 to 1) to 0-40 point scale
-                sentiment_points = (avg_sentiment + 1) * 20  # Scale to 0-40
-                score += sentiment_points - 20  # Adjust so 0 sentiment = no change
-            
-            # Article count scoring (20 points max)
-            total_articles = sentiment_data.get('total_articles', 0)
-            if total_articles >= 10:
-                score += 20  # Good coverage
-            elif total_articles >= 5:
-                score += 15  # Fair coverage
-            elif total_articles >= 2:
-                score += 10  # Limited coverage
-            elif total_articles >= 1:
-                score += 5   # Minimal coverage
-            # No articles = no points
-            
-            # Positive vs negative ratio (20 points max)
-            positive_count = sentiment_data.get('positive_count', 0)
-            negative_count = sentiment_data.get('negative_count', 0)
-            total_sentiment_articles = positive_count + negative_count
-            
-            if total_sentiment_articles > 0:
-                positive_ratio = positive_count / total_sentiment_articles
-                if positive_ratio >= 0.8:
-                    score += 20  # Overwhelmingly positive
-                elif positive_ratio >= 0.6:
-                    score += 15  # Mostly positive
-                elif positive_ratio >= 0.4:
-                    score += 5   # Balanced
-                elif positive_ratio >= 0.2:
-                    score -= 5   # Mostly negative
-                else:
-                    score -= 15  # Overwhelmingly negative
-            
-            # Sentiment volatility penalty (up to -10 points)
-            sentiment_volatility = sentiment_data.get('sentiment_volatility', 0.0)
-            if sentiment_volatility > 0.5:
-                score -= 10  # High volatility is bad
-            elif sentiment_volatility > 0.3:
-                score -= 5   # Moderate volatility
-            
-            # Ensure score is within bounds
-            return max(0, min(100, score))
+            avg, articles, positive, negative, volatility = _SENT_KEYS({**_SENT_DEFAULTS, **sentiment_data})
+            return float(sentiment_score(
+                as_float(avg), as_float(articles), as_float(positive),
+                as_float(negative), as_float(volatility)
+            ))
             
         except Exception as e:
             print(f"Error calculating sentiment score: {e}")
@@ -255,12 +260,7 @@ class AggregatorAgent:
     
     def _generate_recommendation(self, overall_score: float) -> str:
         """Generate BUY/HOLD/SELL recommendation based on overall score"""
-        if overall_score >= self.recommendation_thresholds['buy']:
-            return 'BUY'
-        elif overall_score >= self.recommendation_thresholds['hold_upper']:
-            return 'HOLD'
-        else:
-            return 'SELL'
+        return self._REC_LABELS[bisect_right(self._REC_BINS, overall_score)]
     
     def _generate_reasoning(
         self, 
@@ -272,68 +272,36 @@ class AggregatorAgent:
     ) -> str:
         """Generate human-readable reasoning for the recommendation"""
         try:
-            reasoning_parts = []
-            
-            # Overall assessment
-            if overall_score >= 80:
-                reasoning_parts.append("Strong overall performance")
-            elif overall_score >= 60:
-                reasoning_parts.append("Good overall performance")
-            elif overall_score >= 40:
-                reasoning_parts.append("Mixed performance signals")
-            else:
-                reasoning_parts.append("Weak overall performance")
-            
-            # Fundamental analysis reasoning
-            if fundamental_score >= 70:
-                reasoning_parts.append("strong fundamentals")
-            elif fundamental_score >= 50:
-                reasoning_parts.append("decent fundamentals")
-            else:
-                reasoning_parts.append("weak fundamentals")
-            
-            # Add specific fundamental insights
-            pe_ratio = fundamental_data.get('pe_ratio')
-            if pe_ratio and pe_ratio < 15:
-                reasoning_parts.append("attractive valuation")
-            elif pe_ratio and pe_ratio > 30:
-                reasoning_parts.append("high valuation")
-            
-            roe = fundamental_data.get('roe')
-            if roe:
-                roe_percent = roe * 100 if roe < 1 else roe
-                if roe_percent > 20:
-                    reasoning_parts.append("excellent returns on equity")
-                elif roe_percent < 5:
-                    reasoning_parts.append("low returns on equity")
-            
-            # Sentiment analysis reasoning
-            avg_sentiment = sentiment_data.get('avg_sentiment', 0)
-            total_articles = sentiment_data.get('total_articles', 0)
-            
-            if sentiment_score >= 70:
-                reasoning_parts.append("positive market sentiment")
-            elif sentiment_score >= 50:
-                reasoning_parts.append("neutral market sentiment")
-            else:
-                reasoning_parts.append("negative market sentiment")
-            
-            if total_articles >= 10:
-                reasoning_parts.append("good news coverage")
-            elif total_articles < 2:
-                reasoning_parts.append("limited news coverage")
-            
-            # Risk factors
-            debt_to_equity = fundamental_data.get('debt_to_equity')
-            if debt_to_equity and debt_to_equity > 1.0:
-                reasoning_parts.append("high debt levels")
+            pe_ratio, roe_pct, debt_to_equity = _REASONING_FUND_KEYS(
+                {**_FUND_DEFAULTS, **with_percent_fields(fundamental_data)}
+            )
+            total_articles = _SENT_KEYS({**_SENT_DEFAULTS, **sentiment_data})[1]
+            
+            reasoning_parts = (
+                self._OVERALL_MSGS[bisect_right(self._OVERALL_BINS, overall_score)],
+                self._FUNDAMENTAL_MSGS[bisect_right(self._FUNDAMENTAL_BINS, fundamental_score)],
+                # Specific fundamental insights
+                self._insight(self._PE_MSGS, self._PE_BINS, pe_ratio),
+                self._insight(self._ROE_MSGS, self._ROE_BINS, roe_pct),
+                self._SENTIMENT_MSGS[bisect_right(self._SENTIMENT_BINS, sentiment_score)],
+                self._ARTICLES_MSGS[bisect_right(self._ARTICLES_BINS, total_articles)],
+                # Risk factors
+                self._insight(self._DEBT_MSGS, self._DEBT_BINS, debt_to_equity)
+            )
             
             # Combine reasoning
-            return ". ".join(reasoning_parts).capitalize() + "."
+            return ". ".join([part for part in reasoning_parts if part]).capitalize() + "."
             
         except Exception as e:
             return f"Analysis completed with overall score of {overall_score:.1f}/100"
     
+    @staticmethod
+    def _insight(messages: Tuple, bins: Tuple, value) -> Optional[str]:
+        """Pick the reasoning fragment for a metric, skipping missing, zero or NaN values"""
+        if not value or value != value:
+            return None
+        return messages[bisect_right(bins, value)]
+    
     def _get_error_result(self, ticker: str, company_name: str, error_msg: str) -> Dict:
         """Return error result when aggregation fails"""
         return {
@@ -348,48 +316,231 @@ class AggregatorAgent:
             'analysis_timestamp': time.time()
         }
     
-    def batch_aggregate(self, stocks_data: List[Dict], weights: Dict) -> List[Dict]:
-        """Aggregate multiple stocks at once"""
+    def batch_aggregate(
+        self,
+        stocks_data: List[Dict],
+        weights: Dict,
+        fundamental_agent=None,
+        sentiment_agent=None
+    ) -> List[Dict]:
+        """
+        Aggregate multiple stocks at once using the vectorized scoring kernels
+        
+        Args:
+            stocks_data: List of dicts with ticker, company_name and optionally
+                fundamental_data/sentiment_data
+            weights: Dict with 'fundamental' and 'sentiment' weights
+            fundamental_agent: Optional FundamentalAgent used to fetch missing fundamental_data
+            sentiment_agent: Optional SentimentAgent used to fetch missing sentiment_data
+            
+        Returns:
+            List of aggregated results in input order
+        """
         results = []
+        if not stocks_data:
+            return results
+        
+        fundamental_weight, sentiment_weight = self._normalize_weights(
+            weights.get('fundamental', 0.5),
+            weights.get('sentiment', 0.5)
+        )
         
-        for stock_data in stocks_data:
+        if fundamental_agent is not None or sentiment_agent is not None:
+            fetched = self._fetch_missing_data(stocks_data, fundamental_agent, sentiment_agent)
+            fundamental_list = [with_percent_fields(f) for f, _ in fetched]
+            sentiment_list = [s for _, s in fetched]
+        else:
+            fundamental_list = [with_percent_fields(s.get('fundamental_data') or {}) for s in stocks_data]
+            sentiment_list = [s.get('sentiment_data') or {} for s in stocks_data]
+        
+        fundamental_scores = self._fundamental_scores_vec(self._to_soa(fundamental_list, _FUND_FIELDS))
+        sentiment_scores = self._sentiment_scores_vec(
+            self._to_soa(sentiment_list, _SENT_FIELDS, defaults=_SENT_DEFAULTS)
+        )
+        
+        # Back to float for the kernel and the result dicts
+        fundamental_scores = fundamental_scores.astype(np.float64)
+        overall_scores = kernels.weighted_scores(
+            fundamental_scores, sentiment_scores, fundamental_weight, sentiment_weight
+        )
+        
+        # One wall-clock read for the whole batch
+        analysis_timestamp = time.time()
+        
+        for stock_data, fund_data, sent_data, fund_score, sent_score, overall_score in zip(
+            stocks_data, fundamental_list, sentiment_list,
+            fundamental_scores.tolist(), sentiment_scores.tolist(), overall_scores.tolist()
+        ):
+            ticker = stock_data.get('ticker', '')
+            company_name = stock_data.get('company_name', '')
             try:
-                result = self.aggregate_scores(
-                    ticker=stock_data.get('ticker', ''),
-                    company_name=stock_data.get('company_name', ''),
-                    screening_data=stock_data.get('screening_data', {}),
-                    fundamental_data=stock_data.get('fundamental_data', {}),
-                    sentiment_data=stock_data.get('sentiment_data', {}),
-                    fundamental_weight=weights.get('fundamental', 0.5),
-                    sentiment_weight=weights.get('sentiment', 0.5)
+                result = self._build_result(
+                    ticker,
+                    company_name,
+                    fund_data,
+                    sent_data,
+                    fund_score,
+                    sent_score,
+                    fundamental_weight,
+                    sentiment_weight,
+                    analysis_timestamp,
+                    overall_score
                 )
                 results.append(result)
             except Exception as e:
-                print(f"Error processing {stock_data.get('ticker', 'unknown')}: {e}")
+                print(f"Error processing {ticker or 'unknown'}: {e}")
                 continue
         
         return results
     
+    def _fetch_missing_data(self, stocks_data: List[Dict], fundamental_agent, sentiment_agent) -> List[Tuple[Dict, Dict]]:
+        """Fetch missing fundamental/sentiment data concurrently (network-bound, so threads suffice)"""
+        def fetch(stock_data: Dict) -> Tuple[Dict, Dict]:
+            ticker = stock_data.get('ticker', '')
+            fund_data = stock_data.get('fundamental_data')
+            sent_data = stock_data.get('sentiment_data')
+            
+            # One failing ticker must not abort the rest of the batch
+            try:
+                if fund_data is None and fundamental_agent is not None:
+                    fund_data = fundamental_agent.analyze_stock(ticker)
+                if sent_data is None and sentiment_agent is not None:
+                    sent_data = sentiment_agent.analyze_sentiment(ticker, stock_data.get('company_name', ticker))
+            except Exception as e:
+                print(f"Error fetching data for {ticker or 'unknown'}: {e}")
+                return {}, {}
+            
+            return fund_data or {}, sent_data or {}
+        
+        with ThreadPoolExecutor(max_workers=min(16, len(stocks_data))) as executor:
+            # map() preserves input order
+            return list(executor.map(fetch, stocks_data))
+    
+    @staticmethod
+    def _to_soa(records: List[Dict], keys: Tuple[str, ...], defaults: Optional[Dict] = None) -> Dict[str, np.ndarray]:
+        """Convert a list of metric dicts into a dict of float arrays (NaN for missing)"""
+        defaults = defaults or {}
+        
+        return {
+            key: np.fromiter(
+                (as_float(r.get(key, defaults.get(key))) for r in records),
+                dtype=np.float64,
+                count=len(records)
+            )
+            for key in keys
+        }
+    
+    @staticmethod
+    def _lookup_points(values: np.ndarray, metric: str, valid: np.ndarray, dtype=np.float64) -> np.ndarray:
+        """Map values to the threshold points of a metric, contributing 0 where not valid"""
+        bins = getattr(kernels, f"{metric}_BINS")
+        points = getattr(kernels, f"{metric}_PTS")
+        side = getattr(kernels, f"{metric}_SIDE")
+        idx = np.searchsorted(bins, np.where(valid, values, 0.0), side=side)
+        return np.where(valid, points[idx], 0.0).astype(dtype, copy=False)
+    
+    def _fundamental_scores_vec(self, arrs: Dict[str, np.ndarray]) -> np.ndarray:
+        """
+        Vectorized equivalent of _calculate_fundamental_score over a portfolio
+        
+        Every threshold contribution is a whole number, so scores are accumulated
+        in int16 (room for negative deltas) and returned losslessly as uint8.
+        """
+        pe = arrs['pe_ratio']
+        pb = arrs['pb_ratio']
+        roe_pct = arrs['roe_pct']
+        margin_pct = arrs['margin_pct']
+        de = arrs['debt_to_equity']
+        growth_pct = arrs['growth_pct']
+        
+        score = np.full(len(pe), 50, dtype=np.int16)
+        with np.errstate(invalid='ignore'):
+            score += self._lookup_points(pe, 'PE', ~np.isnan(pe) & (pe > 0), np.int16)
+            score += self._lookup_points(pb, 'PB', ~np.isnan(pb) & (pb > 0), np.int16)
+            score += self._lookup_points(roe_pct, 'ROE', ~np.isnan(roe_pct), np.int16)
+            score += self._lookup_points(margin_pct, 'MARGIN', ~np.isnan(margin_pct), np.int16)
+            score += self._lookup_points(de, 'DE', ~np.isnan(de), np.int16)
+            score += self._lookup_points(growth_pct, 'GROWTH', ~np.isnan(growth_pct), np.int16)
+        
+        return np.clip(score, 0, 100).astype(np.uint8)
+    
+    def _sentiment_scores_vec(self, arrs: Dict[str, np.ndarray]) -> np.ndarray:
+        """
+        Vectorized equivalent of _calculate_sentiment_score over a portfolio
+        
+        Kept in float64: the average VADER score makes this continuous.
+        """
+        avg_sentiment = arrs['avg_sentiment']
+        total_articles = arrs['total_articles']
+        positive = np.nan_to_num(arrs['positive_count'])
+        negative = np.nan_to_num(arrs['negative_count'])
+        volatility = arrs['sentiment_volatility']
+        
+        rated = positive + negative
+        positive_ratio = np.divide(positive, rated, out=np.zeros_like(positive), where=rated > 0)
+        
+        with np.errstate(invalid='ignore'):
+            score = (
+                50.0
+                # Convert VADER score (-1 to 1) so 0 sentiment = no change
+                + np.where(np.isnan(avg_sentiment), 0.0, (avg_sentiment + 1) * 20 - 20)
+                + self._lookup_points(total_articles, 'ARTICLE', ~np.isnan(total_articles))
+                + self._lookup_points(positive_ratio, 'RATIO', rated > 0)
+                + self._lookup_points(volatility, 'VOLATILITY', ~np.isnan(volatility))
+            )
+        
+        return np.clip(score, 0, 100)
+    
     def get_portfolio_summary(self, results: List[Dict]) -> Dict:
         """Generate portfolio-level summary statistics"""
         try:
             if not results:
                 return {'error': 'No results to summarize'}
             
-            scores = [r['overall_score'] for r in results if 'overall_score' in r]
-            recommendations = [r['recommendation'] for r in results if 'recommendation' in r]
+            # Single pass: running sums for mean/std, recommendation counts, best/worst
+            score_sum = 0.0
+            score_sq_sum = 0.0
+            score_count = 0
+            distribution = {'BUY': 0, 'HOLD': 0, 'SELL': 0}
+            top_performer = worst_performer = None
+            best_score = -math.inf
+            worst_score = math.inf
+            
+            for r in results:
+                score = r.get('overall_score')
+                if score is not None:
+                    score_sum += score
+                    score_sq_sum += score * score
+                    score_count += 1
+                
+                recommendation = r.get('recommendation')
+                if recommendation in distribution:
+                    distribution[recommendation] += 1
+                
+                # Running top-1/bottom-1 (strict compare keeps the first on ties);
+                # results without a score rank as 0 for best and 100 for worst
+                best_key = score if score is not None else 0
+                if best_key > best_score:
+                    best_score = best_key
+                    top_performer = r
+                worst_key = score if score is not None else 100
+                if worst_key < worst_score:
+                    worst_score = worst_key
+                    worst_performer = r
+            
+            if score_count:
+                average_score = score_sum / score_count
+                score_std = math.sqrt(max(0.0, score_sq_sum / score_count - average_score ** 2))
+            else:
+                average_score = score_std = 0
             
             return {
                 'total_stocks': len(results),
-                'average_score': round(np.mean(scores), 1) if scores else 0,
-                'score_std': round(np.std(scores), 1) if scores else 0,
-                'recommendation_distribution': {
-                    'BUY': recommendations.count('BUY'),
-                    'HOLD': recommendations.count('HOLD'),
-                    'SELL': recommendations.count('SELL')
-                },
-                'top_performer': max(results, key=lambda x: x.get('overall_score', 0)) if results else None,
-                'worst_performer': min(results, key=lambda x: x.get('overall_score', 100)) if results else None
+                'average_score': round(average_score, 1),
+                'score_std': round(score_std, 1),
+                'recommendation_distribution': distribution,
+                'top_performer': top_performer,
+                'worst_performer': worst_performer
             }
             
         except Exception as e:
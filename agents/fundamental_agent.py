@@ -1,14 +1,39 @@
 import yfinance as yf
 import pandas as pd
+from functools import lru_cache
 from typing import Dict, Optional
 import time
+from datetime import datetime
+
+from agents._score_kernels import PERCENT_FIELDS, to_percent
+
+@lru_cache(maxsize=4096)
+def _format_large(value: float) -> str:
+    """Format a rupee amount with T/B/Cr/L suffixes"""
+    if value >= 1e12:
+        return f"₹{value/1e12:.2f}T"
+    elif value >= 1e9:
+        return f"₹{value/1e9:.2f}B"
+    elif value >= 1e7:
+        return f"₹{value/1e7:.2f}Cr"
+    elif value >= 1e5:
+        return f"₹{value/1e5:.2f}L"
+    else:
+        return f"₹{value:,.0f}"
 
 class FundamentalAgent:
     """Agent responsible for fundamental analysis using yfinance"""
     
-    def __init__(self):
+    __slots__ = ('cache', 'cache_duration', 'cache_manager', 'persistent_cache_ttl')
+    
+    def __init__(self, cache_manager=None):
         self.cache = {}
         self.cache_duration = 300  # 5 minutes cache
+        
+        # Optional persistent cache (utils.cache_manager.CacheManager) so that
+        # fundamentals survive process restarts; keys are stamped with the date
+        self.cache_manager = cache_manager
+        self.persistent_cache_ttl = 86400  # 1 day
     
     def analyze_stock(self, ticker: str) -> Dict:
         """
@@ -20,17 +45,28 @@ class FundamentalAgent:
         Returns:
             Dictionary containing fundamental metrics
         """
+        # Single clock read shared by the cache check, cache entry and result
+        now = time.time()
+        
         try:
             # Add .NS suffix for Indian stocks if not present
             yf_ticker = ticker if '.NS' in ticker else f"{ticker}.NS"
             
             # Check cache first
             cache_key = f"fundamental_{yf_ticker}"
-            if self._is_cached(cache_key):
+            if self._is_cached(cache_key, now):
                 return self.cache[cache_key]['data']
             
-            # Fetch stock data
-            stock = yf.Ticker(yf_ticker)
+            # Then the persistent cache, refreshed daily via the date in the key
+            persistent_key = f"{cache_key}_{datetime.fromtimestamp(now):%Y%m%d}"
+            if self.cache_manager is not None:
+                cached_data = self.cache_manager.get(persistent_key)
+                if cached_data is not None:
+                    self._cache_data(cache_key, cached_data, now)
+                    return cached_data
+            
+            # Fetch stock data (shared Ticker, so repeat lookups reuse fetched data)
+            stock = self._get_ticker(yf_ticker, int(now // self.cache_duration))
             
             # Get basic info
             info = stock.info
@@ -90,12 +126,16 @@ class FundamentalAgent:
                 # Additional metrics from financials
                 **financials,
                 
-                'analysis_timestamp': time.time(),
+                'analysis_timestamp': now,
                 'data_quality': self._assess_data_quality(info)
             }
             
+            self._normalize_ratios(fundamental_data)
+            
             # Cache the results
-            self._cache_data(cache_key, fundamental_data)
+            self._cache_data(cache_key, fundamental_data, now)
+            if self.cache_manager is not None:
+                self.cache_manager.set(persistent_key, fundamental_data, ttl=self.persistent_cache_ttl)
             
             return fundamental_data
             
@@ -104,61 +144,49 @@ class FundamentalAgent:
             return {
                 'ticker': ticker,
                 'error': str(e),
-                'analysis_timestamp': time.time(),
+                'analysis_timestamp': now,
                 'data_quality': 'error'
             }
     
+    @staticmethod
+    @lru_cache(maxsize=128)
+    def _get_ticker(yf_ticker: str, ttl_bucket: int) -> yf.Ticker:
+        """
+        Get a yf.Ticker shared across agent instances.
+        
+        yfinance memoizes info/financials on the Ticker object, so reusing it
+        avoids duplicate HTTP fetches. ttl_bucket rolls over every
+        cache_duration seconds so stale Tickers age out of the cache.
+        """
+        return yf.Ticker(yf_ticker)
+    
+    # Raw (pretty=False) income statement row names, in order of preference
+    REVENUE_KEYS = ('TotalRevenue', 'OperatingRevenue', 'Revenue', 'NetSales')
+    NET_INCOME_KEYS = ('NetIncome', 'NetIncomeCommonStockholders')
+    
     def _get_safe_financials(self, stock) -> Dict:
         """Safely extract financial data from yfinance"""
         try:
-            # Get quarterly and annual financials
-            quarterly_financials = stock.quarterly_financials
-            annual_financials = stock.financials
-            
             financials_data = {}
             
-            # Extract key financial metrics if available
-            if not quarterly_financials.empty:
-                try:
-                    # Most recent quarter
-                    recent_quarter = quarterly_financials.columns[0]
-                    
-                    # Revenue (try different possible names)
-                    revenue_keys = ['Total Revenue', 'Revenue', 'Net Sales']
-                    for key in revenue_keys:
-                        if key in quarterly_financials.index:
-                            financials_data['quarterly_revenue'] = quarterly_financials.loc[key, recent_quarter]
-                            break
-                    
-                    # Net Income
-                    income_keys = ['Net Income', 'Net Income Common Stockholders']
-                    for key in income_keys:
-                        if key in quarterly_financials.index:
-                            financials_data['quarterly_net_income'] = quarterly_financials.loc[key, recent_quarter]
-                            break
-                            
-                except Exception as e:
-                    print(f"Error extracting quarterly financials: {e}")
-            
-            # Extract annual data if available
-            if not annual_financials.empty:
+            # Plain nested dicts ({period: {row: value}}) instead of DataFrames
+            for prefix, freq in (('quarterly', 'quarterly'), ('annual', 'yearly')):
                 try:
-                    recent_year = annual_financials.columns[0]
+                    statement = stock.get_income_stmt(as_dict=True, freq=freq)
+                    if not statement:
+                        continue
                     
-                    # Annual revenue
-                    for key in ['Total Revenue', 'Revenue', 'Net Sales']:
-                        if key in annual_financials.index:
-                            financials_data['annual_revenue'] = annual_financials.loc[key, recent_year]
-                            break
+                    # Most recent period
+                    recent = statement[max(statement)]
                     
-                    # Annual net income
-                    for key in ['Net Income', 'Net Income Common Stockholders']:
-                        if key in annual_financials.index:
-                            financials_data['annual_net_income'] = annual_financials.loc[key, recent_year]
-                            break
+                    for field, keys in (('revenue', self.REVENUE_KEYS), ('net_income', self.NET_INCOME_KEYS)):
+                        for key in keys:
+                            if key in recent:
+                                financials_data[f'{prefix}_{field}'] = recent[key]
+                                break
                             
                 except Exception as e:
-                    print(f"Error extracting annual financials: {e}")
+                    print(f"Error extracting {prefix} financials: {e}")
             
             return financials_data
             
@@ -172,45 +200,40 @@ class FundamentalAgent:
             return 'N/A'
         
         try:
-            value = float(value)
-            if value >= 1e12:
-                return f"₹{value/1e12:.2f}T"
-            elif value >= 1e9:
-                return f"₹{value/1e9:.2f}B"
-            elif value >= 1e7:
-                return f"₹{value/1e7:.2f}Cr"
-            elif value >= 1e5:
-                return f"₹{value/1e5:.2f}L"
-            else:
-                return f"₹{value:,.0f}"
-        except:
+            # Keyed on the exact float so cached output matches direct formatting
+            return _format_large(float(value))
+        except (TypeError, ValueError):
             return str(value)
     
+    def _normalize_ratios(self, fundamental_data: Dict):
+        """Add roe_pct/margin_pct/growth_pct so consumers don't re-derive decimal vs percent"""
+        for raw_key, pct_key in PERCENT_FIELDS:
+            fundamental_data[pct_key] = to_percent(fundamental_data.get(raw_key))
+    
     def _assess_data_quality(self, info: Dict) -> str:
         """Assess the quality of data retrieved"""
-        key_metrics = ['trailingPE', 'priceToBook', 'returnOnEquity', 'marketCap']
-        available_metrics = sum(1 for metric in key_metrics if info.get(metric) is not None)
+        available_metrics = 0
+        for metric in ('trailingPE', 'priceToBook', 'returnOnEquity', 'marketCap'):
+            if info.get(metric) is not None:
+                available_metrics += 1
+                if available_metrics >= 3:
+                    return 'good'  # No need to check the remaining metrics
         
-        if available_metrics >= 3:
-            return 'good'
-        elif available_metrics >= 2:
-            return 'fair'
-        else:
-            return 'poor'
+        return 'fair' if available_metrics == 2 else 'poor'
     
-    def _is_cached(self, cache_key: str) -> bool:
+    def _is_cached(self, cache_key: str, now: Optional[float] = None) -> bool:
         """Check if data is cached and still valid"""
         if cache_key not in self.cache:
             return False
         
         cache_time = self.cache[cache_key]['timestamp']
-        return (time.time() - cache_time) < self.cache_duration
+        return ((now if now is not None else time.time()) - cache_time) < self.cache_duration
     
-    def _cache_data(self, cache_key: str, data: Dict):
+    def _cache_data(self, cache_key: str, data: Dict, timestamp: Optional[float] = None):
         """Cache data with timestamp"""
         self.cache[cache_key] = {
             'data': data,
-            'timestamp': time.time()
+            'timestamp': timestamp if timestamp is not None else time.time()
         }
     
     def get_peer_comparison(self, ticker: str, sector: str = None) -> Dict:
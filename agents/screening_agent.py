@@ -1,25 +1,157 @@
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from urllib3.util import Retry
+from lxml import etree, html as lxml_html
+import logging
+import threading
 import time
-import random
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 import re
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+# requests-cache is optional: persists fetched pages on disk so warm runs skip
+# the network entirely; a plain requests.Session is used when it is missing
+try:
+    import requests_cache
+except ImportError:
+    requests_cache = None
+
+# Brotli is optional: urllib3 decodes 'br' responses only when a brotli
+# package is installed, so it is only advertised in that case
+try:
+    import brotli  # noqa: F401
+    _ACCEPT_ENCODING = 'br, gzip, deflate'
+except ImportError:
+    try:
+        import brotlicffi  # noqa: F401
+        _ACCEPT_ENCODING = 'br, gzip, deflate'
+    except ImportError:
+        _ACCEPT_ENCODING = 'gzip, deflate'
+
+# selectolax is optional: a much faster C HTML parser for the hot scrape paths,
+# with lxml used whenever it is missing or fails
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:
+    LexborHTMLParser = None
+
+logger = logging.getLogger(__name__)
+
+class _TokenBucket:
+    """Thread-safe token bucket allowing max_rate requests per time_period seconds"""
+    
+    def __init__(self, max_rate: float, time_period: float):
+        self.capacity = max_rate
+        self.interval = time_period / max_rate
+        self.tokens = max_rate
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+    
+    def acquire(self):
+        """Take a token, sleeping until one is available"""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) / self.interval)
+            self.updated = now
+            # Reserve the token up front so concurrent callers queue behind each other
+            self.tokens -= 1
+            wait = -self.tokens * self.interval
+        
+        if wait > 0:
+            time.sleep(wait)
+    
+    def __enter__(self):
+        self.acquire()
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        return False
 
 class ScreeningAgent:
     """Agent responsible for scraping stock data from screener.in"""
     
+    # Compiled once: these run for every link on every scraped page
+    _TICKER_RE = re.compile(r'/company/([^/]+)/?$')
+    _COMPANY_HREF_RE = re.compile(r'/company/[^/]+/?$')
+    
+    # Company page fields as compiled XPath, so lxml does the filtering in C
+    _HTML_PARSER = lxml_html.HTMLParser(encoding='utf-8')
+    _NUMBER_SPAN = "span[contains(concat(' ', normalize-space(@class), ' '), ' number ')]"
+    _NAME_XPATH = etree.XPath('//h1')
+    _PRICE_XPATH = etree.XPath(f'//{_NUMBER_SPAN}')
+    _MARKET_CAP_XPATH = etree.XPath(
+        f'//section[@id="ratios"]//li[contains(., "Market Cap")][1]//{_NUMBER_SPAN}'
+    )
+    
+    # Popular Indian stocks used when scraping fails, built once with all metadata
+    _FALLBACK_STOCKS = tuple(
+        {
+            'ticker': ticker,
+            'name': name,
+            'market_cap': 'N/A',
+            'current_price': 'N/A',
+            'source': 'fallback'
+        }
+        for ticker, name in (
+            ('RELIANCE', 'Reliance Industries Limited'),
+            ('TCS', 'Tata Consultancy Services Limited'),
+            ('HDFCBANK', 'HDFC Bank Limited'),
+            ('INFY', 'Infosys Limited'),
+            ('ICICIBANK', 'ICICI Bank Limited'),
+            ('HINDUNILVR', 'Hindustan Unilever Limited'),
+            ('ITC', 'ITC Limited'),
+            ('SBIN', 'State Bank of India'),
+            ('BHARTIARTL', 'Bharti Airtel Limited'),
+            ('KOTAKBANK', 'Kotak Mahindra Bank Limited'),
+            ('LT', 'Larsen & Toubro Limited'),
+            ('ASIANPAINT', 'Asian Paints Limited'),
+            ('MARUTI', 'Maruti Suzuki India Limited'),
+            ('HCLTECH', 'HCL Technologies Limited'),
+            ('AXISBANK', 'Axis Bank Limited'),
+            ('TITAN', 'Titan Company Limited'),
+            ('ULTRACEMCO', 'UltraTech Cement Limited'),
+            ('WIPRO', 'Wipro Limited'),
+            ('NESTLEIND', 'Nestle India Limited'),
+            ('POWERGRID', 'Power Grid Corporation of India Limited')
+        )
+    )
+    
     def __init__(self):
         self.base_url = "https://www.screener.in"
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
             'Accept-Language': 'en-US,en;q=0.5',
-            'Accept-Encoding': 'gzip, deflate',
+            'Accept-Encoding': _ACCEPT_ENCODING,
             'Connection': 'keep-alive',
             'Upgrade-Insecure-Requests': '1',
         }
-        self.session = requests.Session()
+        if requests_cache is not None:
+            self.session = requests_cache.CachedSession(
+                '.cache/screener',
+                backend='sqlite',
+                expire_after=timedelta(hours=6),
+                allowable_codes=(200,),
+                allowable_methods=('GET', 'HEAD'),
+                stale_if_error=True
+            )
+        else:
+            self.session = requests.Session()
         self.session.headers.update(self.headers)
+        
+        # Larger keep-alive pool for concurrent fetches, with backoff on transient errors
+        adapter = HTTPAdapter(
+            pool_connections=32,
+            pool_maxsize=32,
+            max_retries=Retry(total=3, backoff_factor=0.5, status_forcelist=[429, 500, 502, 503, 504])
+        )
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        
+        # Paces scraping requests to be respectful to screener.in; concurrent
+        # fetches share the bucket instead of each sleeping after its work
+        self._rate = _TokenBucket(max_rate=1, time_period=1.5)
     
     def get_top_stocks(self, limit: int = 10) -> List[Dict]:
         """
@@ -42,7 +174,7 @@ class ScreeningAgent:
             return stocks
             
         except Exception as e:
-            print(f"Error in screening agent: {e}")
+            logger.warning("Error in screening agent: %s", e)
             return self._get_fallback_stocks(limit)
     
     def _scrape_market_cap_stocks(self, limit: int) -> List[Dict]:
@@ -56,24 +188,28 @@ class ScreeningAgent:
             ]
             
             stocks = []
+            seen = set()
+            link_parser = self._new_link_parser()  # Reused for every candidate URL
             
             for url in urls_to_try:
+                if len(stocks) >= limit:
+                    break
+                
                 try:
-                    response = self.session.get(url, timeout=10)
-                    response.raise_for_status()
+                    # Streamed so the body is only read as far as the parser needs
+                    with self._rate:
+                        response = self.session.get(url, timeout=10, stream=True)
                     
-                    soup = BeautifulSoup(response.content, 'html.parser')
-                    
-                    # Look for company links that follow screener.in pattern
-                    company_links = soup.find_all('a', href=re.compile(r'/company/[^/]+/?$'))
+                    with response:
+                        response.raise_for_status()
+                        
+                        # Look for company links that follow screener.in pattern
+                        company_links = self._extract_company_links(response, limit*2, link_parser)  # Get extra to filter
                     
-                    for link in company_links[:limit*2]:  # Get extra to filter
+                    for href, company_name in company_links:
                         try:
-                            href = link.get('href', '')
-                            company_name = link.text.strip()
-                            
                             # Extract ticker from URL
-                            ticker_match = re.search(r'/company/([^/]+)/?$', href)
+                            ticker_match = ScreeningAgent._TICKER_RE.search(href)
                             if ticker_match and company_name:
                                 ticker = ticker_match.group(1)
                                 
@@ -85,18 +221,21 @@ class ScreeningAgent:
                                 clean_ticker = ticker.replace('.NS', '').upper()
                                 
                                 # Avoid duplicates
-                                if not any(s['ticker'] == clean_ticker for s in stocks):
-                                    stock_data = {
-                                        'ticker': clean_ticker,
-                                        'name': company_name,
-                                        'market_cap': 'N/A',
-                                        'current_price': 'N/A',
-                                        'source': 'screener.in'
-                                    }
-                                    stocks.append(stock_data)
-                                    
-                                    if len(stocks) >= limit:
-                                        break
+                                if clean_ticker in seen:
+                                    continue
+                                
+                                stock_data = {
+                                    'ticker': clean_ticker,
+                                    'name': company_name,
+                                    'market_cap': 'N/A',
+                                    'current_price': 'N/A',
+                                    'source': 'screener.in'
+                                }
+                                stocks.append(stock_data)
+                                seen.add(clean_ticker)
+                                
+                                if len(stocks) >= limit:
+                                    break
                         except Exception as e:
                             continue
                     
@@ -104,16 +243,13 @@ class ScreeningAgent:
                         break  # Found stocks, no need to try other URLs
                         
                 except Exception as e:
-                    print(f"Failed to scrape {url}: {e}")
+                    logger.warning("Failed to scrape %s: %s", url, e)
                     continue
             
-            # Add small delay to be respectful
-            time.sleep(random.uniform(1, 2))
-            
             return stocks[:limit]
             
         except Exception as e:
-            print(f"Error scraping market cap stocks: {e}")
+            logger.warning("Error scraping market cap stocks: %s", e)
             return []
     
     def _get_individual_stock_data(self, ticker: str) -> Optional[Dict]:
@@ -121,27 +257,11 @@ class ScreeningAgent:
         try:
             url = f"{self.base_url}/company/{ticker}/"
             
-            response = self.session.get(url, timeout=10)
+            with self._rate:
+                response = self.session.get(url, timeout=10)
             response.raise_for_status()
             
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Extract company name
-            name_elem = soup.find('h1')
-            company_name = name_elem.text.strip() if name_elem else ticker
-            
-            # Extract current price
-            price_elem = soup.find('span', class_='number')
-            current_price = price_elem.text.strip() if price_elem else 'N/A'
-            
-            # Extract market cap from the ratios section
-            market_cap = 'N/A'
-            ratios_section = soup.find('section', {'id': 'ratios'})
-            if ratios_section:
-                for li in ratios_section.find_all('li'):
-                    if 'Market Cap' in li.text:
-                        market_cap = li.find('span', class_='number').text.strip()
-                        break
+            company_name, current_price, market_cap = self._parse_company_page(response.content, ticker)
             
             stock_data = {
                 'ticker': ticker,
@@ -151,62 +271,144 @@ class ScreeningAgent:
                 'source': 'screener.in'
             }
             
-            # Add delay to be respectful
-            time.sleep(random.uniform(1, 2))
-            
             return stock_data
             
         except Exception as e:
-            print(f"Error getting data for {ticker}: {e}")
+            logger.warning("Error getting data for %s: %s", ticker, e)
             return None
     
-    def _get_fallback_stocks(self, limit: int) -> List[Dict]:
-        """Fallback list of popular Indian stocks"""
-        popular_stocks = [
-            {'ticker': 'RELIANCE', 'name': 'Reliance Industries Limited'},
-            {'ticker': 'TCS', 'name': 'Tata Consultancy Services Limited'},
-            {'ticker': 'HDFCBANK', 'name': 'HDFC Bank Limited'},
-            {'ticker': 'INFY', 'name': 'Infosys Limited'},
-            {'ticker': 'ICICIBANK', 'name': 'ICICI Bank Limited'},
-            {'ticker': 'HINDUNILVR', 'name': 'Hindustan Unilever Limited'},
-            {'ticker': 'ITC', 'name': 'ITC Limited'},
-            {'ticker': 'SBIN', 'name': 'State Bank of India'},
-            {'ticker': 'BHARTIARTL', 'name': 'Bharti Airtel Limited'},
-            {'ticker': 'KOTAKBANK', 'name': 'Kotak Mahindra Bank Limited'},
-            {'ticker': 'LT', 'name': 'Larsen & Toubro Limited'},
-            {'ticker': 'ASIANPAINT', 'name': 'Asian Paints Limited'},
-            {'ticker': 'MARUTI', 'name': 'Maruti Suzuki India Limited'},
-            {'ticker': 'HCLTECH', 'name': 'HCL Technologies Limited'},
-            {'ticker': 'AXISBANK', 'name': 'Axis Bank Limited'},
-            {'ticker': 'TITAN', 'name': 'Titan Company Limited'},
-            {'ticker': 'ULTRACEMCO', 'name': 'UltraTech Cement Limited'},
-            {'ticker': 'WIPRO', 'name': 'Wipro Limited'},
-            {'ticker': 'NESTLEIND', 'name': 'Nestle India Limited'},
-            {'ticker': 'POWERGRID', 'name': 'Power Grid Corporation of India Limited'}
-        ]
+    @staticmethod
+    def _new_link_parser() -> etree.HTMLPullParser:
+        """Pull parser emitting only closed <a> elements"""
+        return etree.HTMLPullParser(events=('end',), tag='a', encoding='utf-8')
+    
+    def _extract_company_links(self, response: requests.Response, limit: int,
+                               parser: Optional[etree.HTMLPullParser] = None) -> List[Tuple[str, str]]:
+        """Return (href, link text) for up to limit company links on a page"""
+        if LexborHTMLParser is not None:
+            try:
+                tree = LexborHTMLParser(response.content)
+                links = []
+                for node in tree.css('a[href*="/company/"]'):
+                    href = node.attributes.get('href') or ''
+                    if ScreeningAgent._COMPANY_HREF_RE.search(href):
+                        links.append((href, node.text().strip()))
+                        if len(links) >= limit:
+                            break
+                return links
+            except Exception as e:
+                logger.warning("selectolax parse failed, falling back to lxml: %s", e)
+        
+        # Incremental parse of the streamed body: stop reading and parsing as
+        # soon as enough links are collected instead of building the whole page
+        if parser is None:
+            parser = self._new_link_parser()
+        links = []
+        
+        def collect():
+            # Always drains the event queue so nothing carries over to the next page
+            for _, link in parser.read_events():
+                href = link.get('href') or ''
+                if len(links) < limit and ScreeningAgent._COMPANY_HREF_RE.search(href):
+                    links.append((href, ''.join(link.itertext()).strip()))
+        
+        try:
+            for chunk in response.iter_content(chunk_size=16384):
+                parser.feed(chunk)
+                collect()
+                if len(links) >= limit:
+                    break
+        finally:
+            # close() resets the parser so the caller can feed it the next page
+            parser.close()
+        
+        collect()
+        return links
+    
+    def _parse_company_page(self, content: bytes, ticker: str) -> Tuple[str, str, str]:
+        """Extract (company name, current price, market cap) from a company page"""
+        if LexborHTMLParser is not None:
+            try:
+                tree = LexborHTMLParser(content)
+                
+                name_elem = tree.css_first('h1')
+                company_name = name_elem.text().strip() if name_elem else ticker
+                
+                price_elem = tree.css_first('span.number')
+                current_price = price_elem.text().strip() if price_elem else 'N/A'
+                
+                # Market cap from the ratios section
+                market_cap = 'N/A'
+                for li in tree.css('section#ratios li'):
+                    if 'Market Cap' in li.text():
+                        number = li.css_first('span.number')
+                        market_cap = number.text().strip() if number else 'N/A'
+                        break
+                
+                return company_name, current_price, market_cap
+            except Exception as e:
+                logger.warning("selectolax parse failed, falling back to lxml: %s", e)
+        
+        doc = lxml_html.document_fromstring(content, parser=ScreeningAgent._HTML_PARSER)
+        
+        # Extract company name
+        name_elems = ScreeningAgent._NAME_XPATH(doc)
+        company_name = name_elems[0].text_content().strip() if name_elems else ticker
         
-        # Return the requested number of stocks
-        selected_stocks = popular_stocks[:limit]
+        # Extract current price
+        price_elems = ScreeningAgent._PRICE_XPATH(doc)
+        current_price = price_elems[0].text_content().strip() if price_elems else 'N/A'
         
-        # Add additional metadata
-        for stock in selected_stocks:
-            stock.update({
-                'market_cap': 'N/A',
-                'current_price': 'N/A',
-                'source': 'fallback'
-            })
+        # Extract market cap from the ratios section
+        market_cap_elems = ScreeningAgent._MARKET_CAP_XPATH(doc)
+        market_cap = market_cap_elems[0].text_content().strip() if market_cap_elems else 'N/A'
         
-        return selected_stocks
+        return company_name, current_price, market_cap
+    
+    def _get_fallback_stocks(self, limit: int) -> List[Dict]:
+        """Fallback list of popular Indian stocks"""
+        # Copies, since callers may add fields to the returned dicts
+        return [dict(stock) for stock in self._FALLBACK_STOCKS[:limit]]
     
     def validate_ticker(self, ticker: str) -> bool:
         """Validate if a ticker exists on screener.in"""
         try:
             url = f"{self.base_url}/company/{ticker}/"
-            response = self.session.get(url, timeout=5)
+            # HEAD only needs the status line, not the page body
+            if requests_cache is not None:
+                # Ticker existence changes rarely, so keep the answer for a day
+                response = self.session.head(url, timeout=5, allow_redirects=True,
+                                             expire_after=timedelta(days=1))
+            else:
+                response = self.session.head(url, timeout=5, allow_redirects=True)
+            
+            if response.status_code in (405, 501):
+                # HEAD not supported on this route: stream a GET and close without reading the body
+                with self.session.get(url, timeout=5, stream=True) as response:
+                    return response.status_code == 200
+            
             return response.status_code == 200
         except:
             return False
     
+    def validate_tickers(self, tickers: List[str], max_workers: int = 16) -> Dict[str, bool]:
+        """
+        Validate several tickers in parallel
+        
+        Args:
+            tickers: Stock ticker symbols
+            max_workers: Maximum simultaneous validation requests
+            
+        Returns:
+            Dictionary mapping ticker to whether it exists on screener.in
+        """
+        if not tickers:
+            return {}
+        
+        # Requests share the session's keep-alive pool, so workers reuse connections
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(tickers))) as executor:
+            return dict(zip(tickers, executor.map(self.validate_ticker, tickers)))
+    
     def search_company(self, query: str) -> List[Dict]:
         """Search for companies on screener.in"""
         try:
@@ -223,5 +425,5 @@ class ScreeningAgent:
                 return []
                 
         except Exception as e:
-            print(f"Search error: {e}")
+            logger.warning("Search error: %s", e)
             return []
@@ -1,10 +1,26 @@
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util import Retry
+import hashlib
 import os
-from typing import Dict, List, Optional
+from collections import Counter
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
 import time
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 import re
 
+import numpy as np
+
+# orjson is optional: a much faster JSON parser for NewsAPI responses,
+# with the stdlib json module used when it is missing
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    import json
+    _json_loads = json.loads
+
 # NLP libraries
 try:
     import nltk
@@ -12,45 +28,183 @@ try:
     from nltk.tokenize import word_tokenize
     from nltk.corpus import stopwords
     
-    # Download required NLTK data
-    nltk.download('vader_lexicon', quiet=True)
-    nltk.download('punkt', quiet=True)
-    nltk.download('stopwords', quiet=True)
+    # Download required NLTK data, skipping anything already installed
+    for resource, package in (
+        ('sentiment/vader_lexicon.zip', 'vader_lexicon'),
+        ('tokenizers/punkt', 'punkt'),
+        ('corpora/stopwords', 'stopwords')
+    ):
+        try:
+            nltk.data.find(resource)
+        except LookupError:
+            nltk.download(package, quiet=True)
 except ImportError:
     print("NLTK not available")
 
 try:
     import spacy
+    from spacy.language import Language
+    
+    # Entity types the analysis reports on
+    ENTITY_LABELS = frozenset({'PERSON', 'ORG', 'PRODUCT', 'EVENT'})
+    
+    @Language.component("filter_ents")
+    def filter_ents(doc):
+        """Keep only the entity types the analysis reports on"""
+        doc.ents = [ent for ent in doc.ents if ent.label_ in ENTITY_LABELS]
+        return doc
+    
     # Load English model (will need to be downloaded: python -m spacy download en_core_web_sm)
     nlp = None
     try:
-        nlp = spacy.load("en_core_web_sm")
+        # Only the tokenizer and NER are needed for entity labels
+        nlp = spacy.load("en_core_web_sm", disable=["parser", "lemmatizer", "attribute_ruler"])
+        
+        # The small model's NER has its own embedding layer; the shared tok2vec
+        # only feeds the tagger, so both can go unless NER listens to it
+        if "tok2vec" in nlp.pipe_names and "ner" not in nlp.get_pipe("tok2vec").listening_components:
+            for name in ("tagger", "tok2vec"):
+                if name in nlp.pipe_names:
+                    nlp.disable_pipe(name)
+        
+        nlp.add_pipe("filter_ents", after="ner")
     except OSError:
         print("spaCy English model not found. Run: python -m spacy download en_core_web_sm")
 except ImportError:
     print("spaCy not available")
     nlp = None
 
+# transformers is optional: set SENTIMENT_MODEL (e.g. ProsusAI/finbert) to score
+# articles with a batched transformer classifier, on GPU when one is available.
+# VADER remains the default and the fallback.
+SENTIMENT_MODEL = os.getenv("SENTIMENT_MODEL")
+hf_pipeline = None
+if SENTIMENT_MODEL:
+    # Only imported when configured, since torch adds seconds to startup
+    try:
+        import torch
+        from transformers import AutoModelForSequenceClassification, AutoTokenizer
+        from transformers import pipeline as hf_pipeline
+    except ImportError:
+        print("transformers/torch not available, using VADER for sentiment")
+
+# Classifier label -> sign of the VADER-style compound score
+_LABEL_SIGNS = {'positive': 1.0, 'negative': -1.0, 'neutral': 0.0}
+
+@lru_cache(maxsize=1)
+def _get_transformer_pipeline():
+    """Shared transformer sentiment pipeline for SENTIMENT_MODEL"""
+    if torch.cuda.is_available():
+        model, tokenizer, device = SENTIMENT_MODEL, None, 0
+    else:
+        # On CPU, int8 dynamic quantization of the Linear layers gives a
+        # 2-4x inference speedup for a negligible accuracy cost
+        model = torch.ao.quantization.quantize_dynamic(
+            AutoModelForSequenceClassification.from_pretrained(SENTIMENT_MODEL),
+            {torch.nn.Linear},
+            dtype=torch.qint8
+        )
+        tokenizer, device = AutoTokenizer.from_pretrained(SENTIMENT_MODEL), -1
+    
+    return hf_pipeline(
+        "sentiment-analysis",
+        model=model,
+        tokenizer=tokenizer,
+        device=device,
+        batch_size=32,
+        truncation=True,
+        max_length=256
+    )
+
+@lru_cache(maxsize=1)
+def _get_sia():
+    """Shared VADER analyzer, so the lexicon is parsed once per process"""
+    return SentimentIntensityAnalyzer()
+
+# VADER's worst case grows super-linearly with input size on punctuation/emoticon
+# heavy text, so inputs are capped and long runs of one symbol are collapsed.
+# VADER counts at most 4 '!' for emphasis, so collapsing to 4 keeps scores intact.
+_MAX_VADER_CHARS = 1000
+_SANITIZE_RE = re.compile(r'([^\w\s])\1{4,}')
+
+@lru_cache(maxsize=4096)
+def _compound_score(sia, text: str) -> float:
+    """VADER compound score, memoized since the same stories recur across tickers and queries"""
+    text = _SANITIZE_RE.sub(r'\1\1\1\1', text[:_MAX_VADER_CHARS])
+    return sia.polarity_scores(text)['compound']
+
+@lru_cache(maxsize=1)
+def _date_window(day_ordinal: int) -> Tuple[str, str]:
+    """NewsAPI from/to dates for the 7 days ending on the given day"""
+    end_date = date.fromordinal(day_ordinal)
+    start_date = end_date - timedelta(days=7)
+    return start_date.strftime('%Y-%m-%d'), end_date.strftime('%Y-%m-%d')
+
+# Runs of non-word characters, collapsed when fingerprinting titles
+_NORM_RE = re.compile(r'\W+')
+
+# Documents per nlp.pipe() minibatch
+SPACY_BATCH_SIZE = int(os.getenv("SPACY_BATCH_SIZE", "32"))
+
 class SentimentAgent:
     """Agent responsible for sentiment analysis using NewsAPI + NLTK + spaCy"""
     
-    def __init__(self):
+    def __init__(self, cache_manager=None):
         self.news_api_key = os.getenv("NEWS_API_KEY", "your_news_api_key")
         self.base_url = "https://newsapi.org/v2"
         self.cache = {}
         self.cache_duration = 3600  # 1 hour cache for news
         
+        # Optional persistent cache (utils.cache_manager.CacheManager) shared
+        # across sessions and restarts; keys are stamped with the date
+        self.cache_manager = cache_manager
+        
         # Initialize sentiment analyzer
         try:
-            self.sia = SentimentIntensityAnalyzer()
+            self.sia = _get_sia()
         except:
             self.sia = None
         
+        self.hf = None
+        if SENTIMENT_MODEL and hf_pipeline is not None:
+            try:
+                self.hf = _get_transformer_pipeline()
+            except Exception as e:
+                print(f"Could not load sentiment model {SENTIMENT_MODEL}, using VADER: {e}")
+        
         # Headers for news API
         self.headers = {
             'X-API-Key': self.news_api_key,
             'User-Agent': 'Stock-Advisor-MVP/1.0'
         }
+        
+        # Persistent session so queries reuse the keep-alive TLS connection to NewsAPI
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        adapter = HTTPAdapter(
+            pool_connections=10,
+            pool_maxsize=20,
+            max_retries=Retry(total=2, backoff_factor=0.3)
+        )
+        self.session.mount('https://', adapter)
+    
+    def warmup(self):
+        """
+        Run a short text through each loaded model
+        
+        The models are loaded at import/construction, but their first call still
+        pays one-off setup; doing it here keeps that off the first ticker.
+        """
+        sample = "Infosys shares rose after strong quarterly results."
+        try:
+            if self.sia:
+                self.sia.polarity_scores(sample)
+            if nlp:
+                nlp(sample)
+            if self.hf is not None:
+                self.hf([sample])
+        except Exception as e:
+            print(f"Error warming up sentiment models: {e}")
     
     def analyze_sentiment(self, ticker: str, company_name: str) -> Dict:
         """
@@ -66,96 +220,104 @@ class SentimentAgent:
         try:
             # Check cache first
             cache_key = f"sentiment_{ticker}"
-            if self._is_cached(cache_key):
-                return self.cache[cache_key]['data']
+            cached_data = self._get_cached(cache_key)
+            if cached_data is not None:
+                return cached_data
             
             # Get news articles
             news_articles = self._get_news_articles(ticker, company_name)
             
-            if not news_articles:
-                return self._get_neutral_sentiment(ticker, "No news articles found")
-            
-            # Analyze sentiment
-            sentiment_results = self._analyze_articles_sentiment(news_articles)
-            
-            # Combine with NER analysis if spaCy is available
-            if nlp:
-                ner_results = self._analyze_named_entities(news_articles)
-                sentiment_results.update(ner_results)
-            
-            # Add metadata
-            sentiment_results.update({
-                'ticker': ticker,
-                'company_name': company_name,
-                'analysis_timestamp': time.time(),
-                'total_articles': len(news_articles),
-                'data_source': 'NewsAPI'
-            })
-            
-            # Cache results
-            self._cache_data(cache_key, sentiment_results)
-            
-            return sentiment_results
+            return self._build_sentiment_results(ticker, company_name, cache_key, news_articles)
             
         except Exception as e:
             print(f"Error analyzing sentiment for {ticker}: {e}")
             return self._get_neutral_sentiment(ticker, f"Error: {str(e)}")
     
+    def _build_sentiment_results(self, ticker: str, company_name: str, cache_key: str, news_articles: List[Dict]) -> Dict:
+        """Run sentiment and NER analysis over fetched articles and cache the results"""
+        if not news_articles:
+            return self._get_neutral_sentiment(ticker, "No news articles found")
+        
+        # Analyze sentiment, combined with NER analysis if spaCy is available
+        sentiment_results = self._analyze_articles(news_articles)
+        
+        # Add metadata
+        sentiment_results.update({
+            'ticker': ticker,
+            'company_name': company_name,
+            'analysis_timestamp': time.time(),
+            'total_articles': len(news_articles),
+            'data_source': 'NewsAPI'
+        })
+        
+        # Cache results
+        self._cache_data(cache_key, sentiment_results)
+        
+        return sentiment_results
+    
+    def _search_queries(self, ticker: str, company_name: str) -> List[str]:
+        """NewsAPI queries for a stock, limited to avoid API quota"""
+        search_queries = [
+            company_name,
+            ticker,
+            f"{company_name} stock",
+            f"{ticker} share price"
+        ]
+        return search_queries[:2]
+    
     def _get_news_articles(self, ticker: str, company_name: str) -> List[Dict]:
         """Fetch news articles from NewsAPI"""
         try:
-            # Prepare search queries
-            search_queries = [
-                company_name,
-                ticker,
-                f"{company_name} stock",
-                f"{ticker} share price"
-            ]
-            
             all_articles = []
             
-            for query in search_queries[:2]:  # Limit to avoid API quota
+            for query in self._search_queries(ticker, company_name):
                 articles = self._search_news(query)
                 all_articles.extend(articles)
-                time.sleep(0.1)  # Small delay between requests
             
-            # Remove duplicates based on title
-            seen_titles = set()
-            unique_articles = []
-            
-            for article in all_articles:
-                title = article.get('title', '').lower()
-                if title not in seen_titles and len(title) > 10:
-                    seen_titles.add(title)
-                    unique_articles.append(article)
-            
-            return unique_articles[:20]  # Limit to 20 most recent articles
+            return self._dedupe_articles(all_articles)
             
         except Exception as e:
             print(f"Error fetching news for {ticker}: {e}")
             return []
     
+    def _dedupe_articles(self, all_articles: List[Dict]) -> List[Dict]:
+        """Remove duplicates based on title"""
+        seen_fingerprints = set()
+        unique_articles = []
+        
+        for article in all_articles:
+            # Normalized so titles differing only in case, spacing or punctuation collide
+            title = _NORM_RE.sub(' ', (article.get('title') or '').lower()).strip()
+            if len(title) <= 10:
+                continue
+            
+            fingerprint = hashlib.blake2b(title.encode(), digest_size=8).digest()
+            if fingerprint not in seen_fingerprints:
+                seen_fingerprints.add(fingerprint)
+                unique_articles.append(article)
+        
+        return unique_articles[:20]  # Limit to 20 most recent articles
+    
     def _search_news(self, query: str) -> List[Dict]:
         """Search for news articles using NewsAPI"""
         try:
-            # Calculate date range (last 7 days)
-            end_date = datetime.now()
-            start_date = end_date - timedelta(days=7)
+            # Date range (last 7 days), formatted once per calendar day
+            from_date, to_date = _date_window(date.today().toordinal())
             
             params = {
                 'q': query,
                 'language': 'en',
                 'sortBy': 'relevancy',
-                'from': start_date.strftime('%Y-%m-%d'),
-                'to': end_date.strftime('%Y-%m-%d'),
+                'from': from_date,
+                'to': to_date,
                 'pageSize': 20
             }
             
             url = f"{self.base_url}/everything"
-            response = requests.get(url, headers=self.headers, params=params, timeout=10)
+            response = self.session.get(url, params=params, timeout=10)
             
             if response.status_code == 200:
-                data = response.json()
+                data = _json_loads(response.content)
                 return data.get('articles', [])
             else:
                 print(f"NewsAPI error: {response.status_code} - {response.text}")
@@ -165,9 +327,30 @@ class SentimentAgent:
             print(f"Error searching news: {e}")
             return []
     
-    def _analyze_articles_sentiment(self, articles: List[Dict]) -> Dict:
-        """Analyze sentiment of news articles using NLTK VADER"""
-        if not self.sia:
+    def _analyze_articles(self, articles: List[Dict]) -> Dict:
+        """Run sentiment scoring and NER over one shared pass of article texts"""
+        texts = []
+        scored_articles = []
+        
+        for article in articles:
+            # Combine title and description for analysis
+            text = self._article_text(article)
+            if len(text) < 10:
+                continue
+            
+            texts.append(text)
+            scored_articles.append(article)
+        
+        results = self._analyze_texts_sentiment(texts, scored_articles)
+        
+        if nlp:
+            results.update(self._analyze_named_entities(texts))
+        
+        return results
+    
+    def _analyze_texts_sentiment(self, texts: List[str], scored_articles: List[Dict]) -> Dict:
+        """Analyze sentiment of article texts using NLTK VADER (or a transformer model if configured)"""
+        if not self.sia and self.hf is None:
             return {
                 'avg_sentiment': 0.0,
                 'sentiment_distribution': {'positive': 0, 'neutral': 0, 'negative': 0},
@@ -175,58 +358,42 @@ class SentimentAgent:
             }
         
         try:
-            sentiments = []
-            positive_count = 0
-            negative_count = 0
-            neutral_count = 0
+            sentiments, analysis_method = self._score_texts(texts)
             
-            detailed_analysis = []
+            # Classify sentiment
+            positive = sentiments >= 0.05
+            negative = sentiments <= -0.05
+            positive_count = int(positive.sum())
+            negative_count = int(negative.sum())
+            total_articles = len(sentiments)
+            neutral_count = total_articles - positive_count - negative_count
             
-            for article in articles:
-                # Combine title and description for analysis
-                text = ""
-                if article.get('title'):
-                    text += article['title'] + " "
-                if article.get('description'):
-                    text += article['description']
-                
-                if len(text.strip()) < 10:
-                    continue
-                
-                # Get VADER sentiment scores
-                scores = self.sia.polarity_scores(text)
-                compound_score = scores['compound']
-                sentiments.append(compound_score)
-                
-                # Classify sentiment
-                if compound_score >= 0.05:
-                    positive_count += 1
-                    sentiment_label = 'positive'
-                elif compound_score <= -0.05:
-                    negative_count += 1
-                    sentiment_label = 'negative'
-                else:
-                    neutral_count += 1
-                    sentiment_label = 'neutral'
-                
-                detailed_analysis.append({
+            labels = np.where(positive, 'positive', np.where(negative, 'negative', 'neutral'))
+            
+            detailed_analysis = [
+                {
                     'title': article.get('title', '')[:100],
-                    'sentiment_score': compound_score,
-                    'sentiment_label': sentiment_label,
+                    'sentiment_score': float(compound_score),
+                    'sentiment_label': str(sentiment_label),
                     'published_at': article.get('publishedAt'),
                     'source': article.get('source', {}).get('name', 'Unknown')
-                })
-            
-            # Calculate average sentiment
-            avg_sentiment = sum(sentiments) / len(sentiments) if sentiments else 0.0
+                }
+                for article, compound_score, sentiment_label in zip(scored_articles[:10], sentiments, labels)
+            ]
             
-            # Additional metrics
-            total_articles = len(sentiments)
-            sentiment_volatility = self._calculate_volatility(sentiments) if sentiments else 0.0
+            # Average, range and volatility (population standard deviation)
+            if total_articles > 0:
+                avg_sentiment = float(sentiments.mean())
+                sentiment_range = [float(sentiments.min()), float(sentiments.max())]
+                sentiment_volatility = float(sentiments.std())
+            else:
+                avg_sentiment = 0.0
+                sentiment_range = [0, 0]
+                sentiment_volatility = 0.0
             
             return {
                 'avg_sentiment': round(avg_sentiment, 3),
-                'sentiment_range': [min(sentiments), max(sentiments)] if sentiments else [0, 0],
+                'sentiment_range': sentiment_range,
                 'sentiment_volatility': round(sentiment_volatility, 3),
                 'positive_count': positive_count,
                 'negative_count': negative_count,
@@ -236,61 +403,69 @@ class SentimentAgent:
                     'negative': round(negative_count / total_articles * 100, 1) if total_articles > 0 else 0,
                     'neutral': round(neutral_count / total_articles * 100, 1) if total_articles > 0 else 0
                 },
-                'detailed_analysis': detailed_analysis[:10],  # Top 10 for display
-                'analysis_method': 'NLTK VADER'
+                'detailed_analysis': detailed_analysis,  # Top 10 for display
+                'analysis_method': analysis_method
             }
             
         except Exception as e:
             print(f"Error in sentiment analysis: {e}")
             return self._get_neutral_sentiment("", f"Analysis error: {str(e)}")
     
-    def _analyze_named_entities(self, articles: List[Dict]) -> Dict:
-        """Analyze named entities using spaCy"""
+    @staticmethod
+    def _article_text(article: Dict) -> str:
+        """Title and description joined into one string for analysis"""
+        return ' '.join(filter(None, (article.get('title'), article.get('description')))).strip()
+    
+    def _score_texts(self, texts: List[str]) -> Tuple[np.ndarray, str]:
+        """Compound scores (-1 to 1) for each text, and the method that produced them"""
+        if self.hf is not None and texts:
+            try:
+                # One batched forward pass over all texts; label sign x confidence
+                # keeps the VADER compound-score contract
+                results = self.hf(texts)
+                sentiments = np.fromiter(
+                    (_LABEL_SIGNS.get(result['label'].lower(), 0.0) * result['score'] for result in results),
+                    dtype=np.float64, count=len(texts)
+                )
+                return sentiments, f"Transformer ({SENTIMENT_MODEL})"
+            except Exception as e:
+                print(f"Transformer sentiment failed, falling back to VADER: {e}")
+                if not self.sia:
+                    raise
+        
+        # Get VADER compound scores into one contiguous buffer
+        sentiments = np.fromiter(
+            (_compound_score(self.sia, text) for text in texts),
+            dtype=np.float64, count=len(texts)
+        )
+        return sentiments, 'NLTK VADER'
+    
+    def _analyze_named_entities(self, texts: List[str]) -> Dict:
+        """Analyze named entities in article texts using spaCy"""
         if not nlp:
             return {'ner_analysis': 'spaCy not available'}
         
         try:
-            all_entities = []
-            entity_sentiment = {}
+            entity_counts = Counter()
             
-            for article in articles:
-                text = ""
-                if article.get('title'):
-                    text += article['title'] + " "
-                if article.get('description'):
-                    text += article['description']
-                
-                if len(text.strip()) < 10:
-                    continue
-                
-                # Process with spaCy
-                doc = nlp(text)
-                
-                # Extract entities
-                for ent in doc.ents:
-                    if ent.label_ in ['PERSON', 'ORG', 'PRODUCT', 'EVENT']:
-                        entity_text = ent.text.lower()
-                        all_entities.append({
-                            'text': ent.text,
-                            'label': ent.label_,
-                            'article_title': article.get('title', '')[:50]
-                        })
+            # Longest first, so each minibatch holds similarly sized docs
+            # (a sorted copy: texts stays aligned with the scored articles)
+            texts = sorted(texts, key=len, reverse=True)
             
-            # Count entity mentions
-            entity_counts = {}
-            for entity in all_entities:
-                key = (entity['text'], entity['label'])
-                entity_counts[key] = entity_counts.get(key, 0) + 1
+            # Process with spaCy in minibatches rather than one pipeline call per article
+            for doc in nlp.pipe(texts, batch_size=SPACY_BATCH_SIZE):
+                # Count entity mentions (filter_ents has already dropped other types)
+                entity_counts.update((ent.text, ent.label_) for ent in doc.ents)
             
             # Get top entities
-            top_entities = sorted(entity_counts.items(), key=lambda x: x[1], reverse=True)[:10]
+            top_entities = entity_counts.most_common(10)
             
             return {
                 'top_entities': [
-                    {'entity': entity[0], 'label': entity[1], 'mentions': count}
+                    {'entity': entity, 'label': label, 'mentions': count}
                     for (entity, label), count in top_entities
                 ],
-                'total_entities_found': len(all_entities),
+                'total_entities_found': sum(entity_counts.values()),
                 'unique_entities': len(entity_counts),
                 'ner_model': 'spaCy en_core_web_sm'
             }
@@ -299,15 +474,6 @@ class SentimentAgent:
             print(f"Error in NER analysis: {e}")
             return {'ner_analysis': f'Error: {str(e)}'}
     
-    def _calculate_volatility(self, sentiments: List[float]) -> float:
-        """Calculate sentiment volatility (standard deviation)"""
-        if len(sentiments) < 2:
-            return 0.0
-        
-        mean = sum(sentiments) / len(sentiments)
-        variance = sum((x - mean) ** 2 for x in sentiments) / len(sentiments)
-        return variance ** 0.5
-    
     def _get_neutral_sentiment(self, ticker: str, reason: str) -> Dict:
         """Return neutral sentiment when analysis fails"""
         return {
@@ -325,6 +491,23 @@ class SentimentAgent:
             'analysis_method': 'fallback'
         }
     
+    def _get_cached(self, cache_key: str) -> Optional[Dict]:
+        """Return cached results from memory, then the persistent cache, or None"""
+        if self._is_cached(cache_key):
+            return self.cache[cache_key]['data']
+        
+        if self.cache_manager is not None:
+            cached_data = self.cache_manager.get(self._persistent_key(cache_key))
+            if cached_data is not None:
+                self.cache[cache_key] = {'data': cached_data, 'timestamp': time.time()}
+                return cached_data
+        
+        return None
+    
+    def _persistent_key(self, cache_key: str) -> str:
+        """Persistent cache key, dated so staleness is bounded to a day"""
+        return f"{cache_key}_{datetime.now():%Y%m%d}"
+    
     def _is_cached(self, cache_key: str) -> bool:
         """Check if data is cached and still valid"""
         if cache_key not in self.cache:
@@ -339,6 +522,9 @@ class SentimentAgent:
             'data': data,
             'timestamp': time.time()
         }
+        
+        if self.cache_manager is not None:
+            self.cache_manager.set(self._persistent_key(cache_key), data, ttl=self.cache_duration)
     
     def get_sentiment_summary(self, ticker: str) -> str:
         """Get a human-readable sentiment summary"""
@@ -1,17 +1,12 @@
 import streamlit as st
-import pandas as pd
-import numpy as np
-import time
-from datetime import datetime
-import os
-import plotly.express as px
-import plotly.graph_objects as go
+import csv
+import io
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from collections import Counter
+from functools import lru_cache
+from textwrap import dedent
+from datetime import date, datetime
 
-# Import our custom agents
-from agents.screening_agent import ScreeningAgent
-from agents.fundamental_agent import FundamentalAgent
-from agents.sentiment_agent import SentimentAgent
-from agents.aggregator_agent import AggregatorAgent
 from utils.cache_manager import CacheManager
 from utils.data_normalizer import DataNormalizer
 
@@ -23,25 +18,171 @@ st.set_page_config(
     initial_sidebar_state="collapsed"
 )
 
+# Sector universes offered for analysis (static, so built once at import)
+SECTORS = {
+    "🖥️ IT & Tech": ("TCS", "INFY", "HCLTECH", "WIPRO", "TECHM"),
+    "🏦 Banking & Finance": ("HDFCBANK", "ICICIBANK", "SBIN", "KOTAKBANK", "AXISBANK"),
+    "🚗 Auto": ("MARUTI", "TATAMOTORS", "M&M", "BAJAJ-AUTO", "EICHERMOT"),
+    "⚗️ Pharma": ("SUNPHARMA", "DRREDDY", "CIPLA", "DIVISLAB", "BIOCON"),
+    "🌿 Green Energy": ("ADANIGREEN", "SUZLON", "TATAPOWER", "NTPC", "POWERGRID"),
+    "🏭 Diversified": ("RELIANCE", "ITC", "HINDUNILVR", "LT", "ASIANPAINT")
+}
+
+SECTOR_KEYS = tuple(SECTORS)
+
+# Fixed choices for the advanced-options selectboxes
+NUM_STOCKS_OPTIONS = (3, 5, 8, 10)
+RISK_TOLERANCE_OPTIONS = ("Conservative", "Moderate", "Aggressive")
+
+# Recommendation -> (accent color, card background, emoji)
+BADGE = {
+    'BUY': ('#4CAF50', 'linear-gradient(135deg, #4CAF50, #45a049)', '✅'),
+    'HOLD': ('#FF9800', 'linear-gradient(135deg, #FF9800, #f57c00)', '⚠️'),
+    'SELL': ('#f44336', 'linear-gradient(135deg, #f44336, #d32f2f)', '❌')
+}
+
+# One label/value row of the per-stock metrics tables
+METRIC_ROW_HTML = (
+    "<div style='display: flex; justify-content: space-between; padding: 8px 0; border-bottom: 1px solid rgba(255,255,255,0.1);'>"
+    "<span style='font-weight: 600;'>{label}:</span>"
+    "<span style='color: var(--text-color);'>{value}</span>"
+    "</div>\n"
+)
+
+# From this many results on, all are listed in a summary table and only the
+# top DETAILED_CARD_LIMIT get a detail card; smaller runs show every card
+COMPACT_TABLE_MIN_RESULTS = 8
+DETAILED_CARD_LIMIT = 3
+
+# Columns of the results CSV export
+EXPORT_FIELDS = ('Rank', 'Ticker', 'Company', 'Recommendation', 'Score', 'PE_Ratio', 'Sentiment')
+
+# Above this many results the comparison chart switches from SVG bars to WebGL
+WEBGL_CHART_THRESHOLD = 50
+
+@lru_cache(maxsize=None)
+def build_screening(sector, num_stocks):
+    """Screening records for the first num_stocks of a sector (shared, treat as read-only)"""
+    return tuple(
+        {
+            'ticker': ticker,
+            'name': f"{ticker} Limited",  # Simplified for demo
+            'sector': sector,
+            'source': 'sector_selection'
+        }
+        for ticker in SECTORS[sector][:num_stocks]
+    )
+
+@lru_cache(maxsize=None)
+def sector_preview(sector):
+    """Markdown line listing the first few stocks of a sector"""
+    return f"**Selected stocks:** {', '.join(SECTORS[sector][:3])}..."
+
+def format_metric(value):
+    """Format a metric for display: small floats to 3 decimals, other floats to 2"""
+    if isinstance(value, float):
+        return f"{value:.3f}" if abs(value) < 1 else f"{value:.2f}"
+    return value
+
+def score_color(score):
+    """Green/amber/red for a 0-100 score (>= 70 / >= 50 / below)"""
+    return '#4CAF50' if score >= 70 else '#FF9800' if score >= 50 else '#f44336'
+
 # Initialize cache manager
 @st.cache_resource
 def get_cache_manager():
     return CacheManager()
 
-# Initialize agents
+# Initialize agents; imported here rather than at module level because they pull
+# in yfinance, NLTK and spaCy, which visitors who never run an analysis needn't load
 @st.cache_resource
 def initialize_agents():
+    from agents.screening_agent import ScreeningAgent
+    from agents.fundamental_agent import FundamentalAgent
+    from agents.sentiment_agent import SentimentAgent
+    from agents.aggregator_agent import AggregatorAgent
+    
     screening_agent = ScreeningAgent()
-    fundamental_agent = FundamentalAgent()
-    sentiment_agent = SentimentAgent()
+    fundamental_agent = FundamentalAgent(cache_manager=get_cache_manager())
+    sentiment_agent = SentimentAgent(cache_manager=get_cache_manager())
+    sentiment_agent.warmup()
     aggregator_agent = AggregatorAgent()
     data_normalizer = DataNormalizer()
     
     return screening_agent, fundamental_agent, sentiment_agent, aggregator_agent, data_normalizer
 
-def main():
-    # Custom CSS for better styling and spacing
-    st.markdown("""
+class _UncachedResult(Exception):
+    """Carries a failed analysis out of an st.cache_data function, which does not cache exceptions"""
+    
+    def __init__(self, result):
+        super().__init__()
+        self.result = result
+
+# Cache agent results across reruns and sessions; agents are captured from the
+# cached resource rather than passed in, since they are not hashable
+# Fundamentals carry the live price, so they are kept fresher than news sentiment;
+# the day argument only keys the cache, so entries never carry over past midnight
+@st.cache_data(ttl=900, max_entries=200, show_spinner=False)
+def cached_fundamental(ticker, day):
+    fundamental_agent = initialize_agents()[1]
+    result = fundamental_agent.analyze_stock(ticker)
+    if 'error' in result:
+        raise _UncachedResult(result)
+    return result
+
+@st.cache_data(ttl=3600, max_entries=200, show_spinner=False)
+def cached_sentiment(ticker, company_name, day):
+    sentiment_agent = initialize_agents()[2]
+    result = sentiment_agent.analyze_sentiment(ticker, company_name)
+    if result.get('analysis_method') == 'fallback':
+        raise _UncachedResult(result)
+    return result
+
+def get_fundamental_data(ticker):
+    """Fundamental analysis for a ticker, cached unless it failed"""
+    try:
+        return cached_fundamental(ticker, date.today().isoformat())
+    except _UncachedResult as e:
+        return e.result
+
+def get_sentiment_data(ticker, company_name):
+    """Sentiment analysis for a ticker, cached unless it fell back to neutral"""
+    try:
+        return cached_sentiment(ticker, company_name, date.today().isoformat())
+    except _UncachedResult as e:
+        return e.result
+
+@st.cache_data(max_entries=20, show_spinner=False)
+def build_csv(rows):
+    """Encode export rows (tuples in EXPORT_FIELDS order) as UTF-8 CSV bytes"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_FIELDS)
+    writer.writerows(rows)
+    return buffer.getvalue().encode('utf-8')
+
+def analyze_stocks_concurrently(screening_results, on_progress, max_workers=16):
+    """Run fundamental and sentiment analysis for every stock at once, reporting completed calls"""
+    fundamental_data = {}
+    sentiment_data = {}
+    
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, 2 * len(screening_results)))) as executor:
+        futures = {}
+        for stock in screening_results:
+            ticker = stock['ticker']
+            futures[executor.submit(get_fundamental_data, ticker)] = (fundamental_data, ticker)
+            futures[executor.submit(get_sentiment_data, ticker, stock['name'])] = (sentiment_data, ticker)
+        
+        # Progress is reported from this (the script) thread as calls finish
+        for completed, future in enumerate(as_completed(futures), 1):
+            results, ticker = futures[future]
+            results[ticker] = future.result()
+            on_progress(completed)
+    
+    return fundamental_data, sentiment_data
+
+# Page styles, injected once at the top of main()
+_CSS_HTML = """
     <style>
     .main-header {
         text-align: center;
@@ -179,7 +320,59 @@ def main():
         }
     }
     </style>
-    """, unsafe_allow_html=True)
+"""
+
+# "How It Works" process cards shown on the welcome screen, one per column
+_HOW_IT_WORKS_CARDS = (
+    """
+    <div class='process-card' style='background: linear-gradient(135deg, #e3f2fd, #bbdefb);'>
+        <h3 style='color: #1976d2;'>🎯 Select</h3>
+        <p style='color: #424242;'>Choose your preferred sector from IT, Banking, Auto, Pharma, and more</p>
+    </div>
+    """,
+    """
+    <div class='process-card' style='background: linear-gradient(135deg, #f3e5f5, #e1bee7);'>
+        <h3 style='color: #7b1fa2;'>⚖️ Balance</h3>
+        <p style='color: #424242;'>Adjust focus between fundamental analysis and sentiment analysis</p>
+    </div>
+    """,
+    """
+    <div class='process-card' style='background: linear-gradient(135deg, #e8f5e8, #c8e6c9);'>
+        <h3 style='color: #388e3c;'>🔍 Analyze</h3>
+        <p style='color: #424242;'>AI agents analyze fundamentals, news sentiment, and market data</p>
+    </div>
+    """,
+    """
+    <div class='process-card' style='background: linear-gradient(135deg, #fff3e0, #ffcc02);'>
+        <h3 style='color: #f57c00;'>📊 Decide</h3>
+        <p style='color: #424242;'>Get BUY/HOLD/SELL recommendations with detailed reasoning</p>
+    </div>
+    """
+)
+
+# Summary count/average card at the top of the results
+_SUMMARY_CARD_HTML = """
+<div class='metric-card' style='background: {background};'>
+    <h2>{value}</h2>
+    <p>{label}</p>
+</div>
+"""
+
+# Mock result card shown on the welcome screen
+_SAMPLE_PREVIEW_HTML = """
+    <div style='border: 2px dashed #ccc; padding: 20px; border-radius: 10px; background: #f9f9f9;'>
+        <div style='display: flex; justify-content: space-between; align-items: center; margin-bottom: 15px;'>
+            <h4 style='margin: 0; color: #333;'>📊 Sample: TCS - Tata Consultancy Services</h4>
+            <span style='background: #4CAF50; color: white; padding: 5px 15px; border-radius: 20px; font-weight: bold;'>✅ BUY</span>
+        </div>
+        <p style='color: #666; margin: 0 0 10px 0;'><strong>Score:</strong> 78.5/100 | <strong>PE:</strong> 22.4 | <strong>Sentiment:</strong> Positive</p>
+        <p style='color: #555; margin: 0; font-style: italic;'>Strong fundamentals with positive market sentiment and excellent returns on equity</p>
+    </div>
+"""
+
+def main():
+    # Custom CSS for better styling and spacing
+    st.markdown(_CSS_HTML, unsafe_allow_html=True)
     
     # Header Section
     st.markdown("""
@@ -189,33 +382,20 @@ def main():
     </div>
     """, unsafe_allow_html=True)
     
-    # Initialize components
-    cache_manager = get_cache_manager()
-    screening_agent, fundamental_agent, sentiment_agent, aggregator_agent, data_normalizer = initialize_agents()
-    
     # Step 1: Sector/Theme Selection
     st.markdown("<div class='section-spacing'>", unsafe_allow_html=True)
     st.markdown("### 🎯 Choose a Sector")
     st.markdown("Select an industry that interests you for focused analysis")
     
-    sectors = {
-        "🖥️ IT & Tech": ["TCS", "INFY", "HCLTECH", "WIPRO", "TECHM"],
-        "🏦 Banking & Finance": ["HDFCBANK", "ICICIBANK", "SBIN", "KOTAKBANK", "AXISBANK"],
-        "🚗 Auto": ["MARUTI", "TATAMOTORS", "M&M", "BAJAJ-AUTO", "EICHERMOT"],
-        "⚗️ Pharma": ["SUNPHARMA", "DRREDDY", "CIPLA", "DIVISLAB", "BIOCON"],
-        "🌿 Green Energy": ["ADANIGREEN", "SUZLON", "TATAPOWER", "NTPC", "POWERGRID"],
-        "🏭 Diversified": ["RELIANCE", "ITC", "HINDUNILVR", "LT", "ASIANPAINT"]
-    }
-    
     selected_sector = st.selectbox(
         "Select sector:",
-        options=list(sectors.keys()),
+        options=SECTOR_KEYS,
         index=0,
         help="Choose a sector that interests you for focused analysis"
     )
     
     # Show selected stocks preview
-    st.markdown(f"**Selected stocks:** {', '.join(sectors[selected_sector][:3])}...")
+    st.markdown(sector_preview(selected_sector))
     st.markdown("</div>", unsafe_allow_html=True)
     
     # Step 2: Sentiment vs Fundamental Weight Slider
@@ -272,7 +452,7 @@ def main():
         with col1:
             num_stocks = st.selectbox(
                 "Number of stocks to analyze:",
-                options=[3, 5, 8, 10],
+                options=NUM_STOCKS_OPTIONS,
                 index=1,
                 help="More stocks = longer analysis time"
             )
@@ -280,7 +460,7 @@ def main():
         with col2:
             risk_tolerance = st.selectbox(
                 "Risk Tolerance:",
-                options=["Conservative", "Moderate", "Aggressive"],
+                options=RISK_TOLERANCE_OPTIONS,
                 index=1,
                 help="Adjusts recommendation thresholds"
             )
@@ -304,6 +484,9 @@ def main():
     if analyze_button:
         with st.spinner("🔍 Multi-Agent Analysis in Progress..."):
             try:
+                # Initialize components (first run of the session loads the agents)
+                aggregator_agent = initialize_agents()[3]
+                
                 # Progress tracking
                 progress_bar = st.progress(0)
                 status_text = st.empty()
@@ -313,16 +496,7 @@ def main():
                 progress_bar.progress(10)
                 
                 # Get stocks from selected sector
-                sector_stocks = sectors[selected_sector][:num_stocks]
-                screening_results = []
-                
-                for ticker in sector_stocks:
-                    screening_results.append({
-                        'ticker': ticker,
-                        'name': f"{ticker} Limited",  # Simplified for demo
-                        'sector': selected_sector,
-                        'source': 'sector_selection'
-                    })
+                screening_results = build_screening(selected_sector, num_stocks)
                 
                 if not screening_results:
                     st.error("❌ No stocks found for selected sector")
@@ -331,64 +505,47 @@ def main():
                 st.success(f"✅ Analyzing {len(screening_results)} stocks from {selected_sector}")
                 progress_bar.progress(25)
                 
-                # Step 2: Fundamental Analysis Agent
-                status_text.text("📊 Fundamental Agent: Analyzing financial metrics...")
-                
-                fundamental_data = {}
-                for i, stock in enumerate(screening_results):
-                    ticker = stock['ticker']
-                    fundamental_data[ticker] = fundamental_agent.analyze_stock(ticker)
-                    progress_bar.progress(25 + (i + 1) * 25 // len(screening_results))
+                # Steps 2 & 3: Fundamental and Sentiment Agents, run concurrently
+                status_text.text("📊📰 Fundamental & Sentiment Agents: Analyzing financials and market sentiment...")
                 
-                progress_bar.progress(50)
+                # Two calls per stock; only redraw the bar about four times
+                total_calls = 2 * len(screening_results)
+                update_every = max(1, total_calls // 4)
                 
-                # Step 3: Sentiment Analysis Agent
-                status_text.text("📰 Sentiment Agent: Analyzing market sentiment...")
+                def update_progress(completed):
+                    if completed % update_every == 0 or completed == total_calls:
+                        progress_bar.progress(25 + completed * 50 // total_calls)
                 
-                sentiment_data = {}
-                for i, stock in enumerate(screening_results):
-                    ticker = stock['ticker']
-                    company_name = stock['name']
-                    sentiment_data[ticker] = sentiment_agent.analyze_sentiment(ticker, company_name)
-                    progress_bar.progress(50 + (i + 1) * 25 // len(screening_results))
+                fundamental_data, sentiment_data = analyze_stocks_concurrently(
+                    screening_results, update_progress
+                )
                 
                 progress_bar.progress(75)
                 
                 # Step 4: Aggregator Agent
                 status_text.text("🔧 Aggregator Agent: Combining analysis results...")
                 
-                final_results = []
-                for stock in screening_results:
-                    ticker = stock['ticker']
-                    
-                    # Get normalized scores
-                    fundamental_score = data_normalizer.normalize_fundamental_score(
-                        fundamental_data.get(ticker, {})
-                    )
-                    sentiment_score = data_normalizer.normalize_sentiment_score(
-                        sentiment_data.get(ticker, {})
-                    )
-                    
-                    # Aggregate scores
-                    aggregated_result = aggregator_agent.aggregate_scores(
-                        ticker=ticker,
-                        company_name=stock['name'],
-                        screening_data=stock,
-                        fundamental_data=fundamental_data.get(ticker, {}),
-                        sentiment_data=sentiment_data.get(ticker, {}),
-                        fundamental_weight=fundamental_weight / 100,
-                        sentiment_weight=sentiment_weight / 100
-                    )
-                    
-                    final_results.append(aggregated_result)
+                # Score every stock in one vectorized pass rather than ticker by ticker
+                final_results = aggregator_agent.batch_aggregate(
+                    [
+                        {
+                            'ticker': stock['ticker'],
+                            'company_name': stock['name'],
+                            'fundamental_data': fundamental_data.get(stock['ticker'], {}),
+                            'sentiment_data': sentiment_data.get(stock['ticker'], {})
+                        }
+                        for stock in screening_results
+                    ],
+                    weights={
+                        'fundamental': fundamental_weight / 100,
+                        'sentiment': sentiment_weight / 100
+                    }
+                )
                 
-                progress_bar.progress(100)
-                status_text.text("✨ Analysis Complete!")
-                
-                # Clear progress indicators
-                time.sleep(1)
+                # Clear the progress bar straight away; the completion note is
+                # left in place and goes away on the next rerun
                 progress_bar.empty()
-                status_text.empty()
+                status_text.success("✨ Analysis Complete!")
                 
                 # Display results
                 display_results(final_results, fundamental_weight, sentiment_weight)
@@ -404,39 +561,9 @@ def main():
         # How it works section
         st.markdown("## 🎯 How It Works")
         
-        col1, col2, col3, col4 = st.columns(4)
-        
-        with col1:
-            st.markdown("""
-            <div class='process-card' style='background: linear-gradient(135deg, #e3f2fd, #bbdefb);'>
-                <h3 style='color: #1976d2;'>🎯 Select</h3>
-                <p style='color: #424242;'>Choose your preferred sector from IT, Banking, Auto, Pharma, and more</p>
-            </div>
-            """, unsafe_allow_html=True)
-        
-        with col2:
-            st.markdown("""
-            <div class='process-card' style='background: linear-gradient(135deg, #f3e5f5, #e1bee7);'>
-                <h3 style='color: #7b1fa2;'>⚖️ Balance</h3>
-                <p style='color: #424242;'>Adjust focus between fundamental analysis and sentiment analysis</p>
-            </div>
-            """, unsafe_allow_html=True)
-        
-        with col3:
-            st.markdown("""
-            <div class='process-card' style='background: linear-gradient(135deg, #e8f5e8, #c8e6c9);'>
-                <h3 style='color: #388e3c;'>🔍 Analyze</h3>
-                <p style='color: #424242;'>AI agents analyze fundamentals, news sentiment, and market data</p>
-            </div>
-            """, unsafe_allow_html=True)
-        
-        with col4:
-            st.markdown("""
-            <div class='process-card' style='background: linear-gradient(135deg, #fff3e0, #ffcc02);'>
-                <h3 style='color: #f57c00;'>📊 Decide</h3>
-                <p style='color: #424242;'>Get BUY/HOLD/SELL recommendations with detailed reasoning</p>
-            </div>
-            """, unsafe_allow_html=True)
+        for col, card in zip(st.columns(4), _HOW_IT_WORKS_CARDS):
+            with col:
+                st.markdown(card, unsafe_allow_html=True)
         
         st.markdown("<br>", unsafe_allow_html=True)
         
@@ -475,16 +602,7 @@ def main():
         
         # Mock sample card for demonstration
         with st.container():
-            st.markdown("""
-            <div style='border: 2px dashed #ccc; padding: 20px; border-radius: 10px; background: #f9f9f9;'>
-                <div style='display: flex; justify-content: space-between; align-items: center; margin-bottom: 15px;'>
-                    <h4 style='margin: 0; color: #333;'>📊 Sample: TCS - Tata Consultancy Services</h4>
-                    <span style='background: #4CAF50; color: white; padding: 5px 15px; border-radius: 20px; font-weight: bold;'>✅ BUY</span>
-                </div>
-                <p style='color: #666; margin: 0 0 10px 0;'><strong>Score:</strong> 78.5/100 | <strong>PE:</strong> 22.4 | <strong>Sentiment:</strong> Positive</p>
-                <p style='color: #555; margin: 0; font-style: italic;'>Strong fundamentals with positive market sentiment and excellent returns on equity</p>
-            </div>
-            """, unsafe_allow_html=True)
+            st.markdown(_SAMPLE_PREVIEW_HTML, unsafe_allow_html=True)
         
         # Call to action
         st.markdown("### 🚀 Ready to Start?")
@@ -525,69 +643,78 @@ def display_results(results, fundamental_weight, sentiment_weight):
     # Summary metrics with improved styling
     col1, col2, col3, col4 = st.columns(4)
     
-    buy_count = len([r for r in results_sorted if r['recommendation'] == 'BUY'])
-    hold_count = len([r for r in results_sorted if r['recommendation'] == 'HOLD'])
-    sell_count = len([r for r in results_sorted if r['recommendation'] == 'SELL'])
-    avg_score = np.mean([r['overall_score'] for r in results_sorted])
-    
-    with col1:
-        st.markdown("""
-        <div class='metric-card' style='background: linear-gradient(135deg, #4CAF50, #45a049);'>
-            <h2>✅ {}</h2>
-            <p>BUY Recommendations</p>
-        </div>
-        """.format(buy_count), unsafe_allow_html=True)
-    
-    with col2:
-        st.markdown("""
-        <div class='metric-card' style='background: linear-gradient(135deg, #FF9800, #f57c00);'>
-            <h2>⚠️ {}</h2>
-            <p>HOLD Recommendations</p>
-        </div>
-        """.format(hold_count), unsafe_allow_html=True)
-    
-    with col3:
-        st.markdown("""
-        <div class='metric-card' style='background: linear-gradient(135deg, #f44336, #d32f2f);'>
-            <h2>❌ {}</h2>
-            <p>SELL Recommendations</p>
-        </div>
-        """.format(sell_count), unsafe_allow_html=True)
-    
-    with col4:
-        st.markdown("""
-        <div class='metric-card' style='background: linear-gradient(135deg, #2196F3, #1976d2);'>
-            <h2>{:.1f}</h2>
-            <p>Average Score</p>
-        </div>
-        """.format(avg_score), unsafe_allow_html=True)
+    # One pass for the summary counts and the chart series
+    # (plus the per-card score colors, so the card loop just indexes them)
+    tickers, scores, colors, texts = [], [], [], []
+    fund_colors, sent_colors = [], []
+    recommendation_counts = Counter()
+    for r in results_sorted:
+        recommendation = r['recommendation']
+        score = r['overall_score']
+        recommendation_counts[recommendation] += 1
+        tickers.append(r['ticker'])
+        scores.append(score)
+        colors.append(BADGE.get(recommendation, BADGE['SELL'])[0])
+        texts.append(f"{score:.1f}")
+        fund_colors.append(score_color(r.get('fundamental_score', 50)))
+        sent_colors.append(score_color(r.get('sentiment_score', 50)))
+    
+    buy_count = recommendation_counts['BUY']
+    hold_count = recommendation_counts['HOLD']
+    sell_count = recommendation_counts['SELL']
+    avg_score = sum(scores) / len(scores) if scores else 0.0
+    
+    summary_cards = (
+        (BADGE['BUY'][1], f"✅ {buy_count}", "BUY Recommendations"),
+        (BADGE['HOLD'][1], f"⚠️ {hold_count}", "HOLD Recommendations"),
+        (BADGE['SELL'][1], f"❌ {sell_count}", "SELL Recommendations"),
+        ('linear-gradient(135deg, #2196F3, #1976d2)', f"{avg_score:.1f}", "Average Score")
+    )
+    for col, (background, value, label) in zip((col1, col2, col3, col4), summary_cards):
+        with col:
+            st.markdown(
+                _SUMMARY_CARD_HTML.format(background=background, value=value, label=label),
+                unsafe_allow_html=True
+            )
     
     st.markdown("</div>", unsafe_allow_html=True)
     
     # Performance chart
     if len(results_sorted) > 1:
-        fig = go.Figure()
-        
-        colors = ['#4CAF50' if r['recommendation'] == 'BUY' 
-                 else '#FF9800' if r['recommendation'] == 'HOLD' 
-                 else '#f44336' for r in results_sorted]
+        # Plotly's figure classes are heavy to import, so load them only when drawn
+        import plotly.graph_objects as go
         
-        fig.add_trace(go.Bar(
-            x=[r['ticker'] for r in results_sorted],
-            y=[r['overall_score'] for r in results_sorted],
-            marker_color=colors,
-            text=[f"{r['overall_score']:.1f}" for r in results_sorted],
-            textposition='auto',
-        ))
+        if len(results_sorted) > WEBGL_CHART_THRESHOLD:
+            # SVG bars get slow for large universes; WebGL markers stay responsive
+            trace = go.Scattergl(
+                x=tickers,
+                y=scores,
+                mode='markers',
+                marker=dict(color=colors, size=16),
+                text=texts,
+            )
+        else:
+            trace = go.Bar(
+                x=tickers,
+                y=scores,
+                marker_color=colors,
+                text=texts,
+                textposition='auto',
+            )
         
-        fig.update_layout(
-            title="📊 Stock Performance Comparison",
-            xaxis_title="Stock Ticker",
-            yaxis_title="Overall Score",
-            showlegend=False,
-            height=400,
-            plot_bgcolor='rgba(0,0,0,0)',
-            paper_bgcolor='rgba(0,0,0,0)',
+        # Trace and layout go through the constructor in a single validation pass
+        fig = go.Figure(
+            data=[trace],
+            layout=dict(
+                title="📊 Stock Performance Comparison",
+                xaxis_title="Stock Ticker",
+                yaxis_title="Overall Score",
+                showlegend=False,
+                height=400,
+                plot_bgcolor='rgba(0,0,0,0)',
+                paper_bgcolor='rgba(0,0,0,0)',
+                uirevision='results',  # Keep zoom/pan state across reruns
+            )
         )
         
         st.plotly_chart(fig, use_container_width=True)
@@ -595,22 +722,52 @@ def display_results(results, fundamental_weight, sentiment_weight):
     # Stock cards with expandable details
     st.markdown("<div class='section-spacing'>", unsafe_allow_html=True)
     st.markdown("### 📋 Detailed Stock Analysis")
-    st.markdown("Click each stock to see full analysis details")
     
-    for i, result in enumerate(results_sorted):
+    # The weighting is the same for every stock, so its bar is drawn once here
+    # rather than inside each card
+    st.markdown("#### ⚖️ Analysis Balance\n\n" + dedent(f"""
+    <div style='background: rgba(255,255,255,0.1); padding: 15px; border-radius: 10px; margin: 10px 0;'>
+        <div style='display: flex; height: 25px; border-radius: 12px; overflow: hidden; margin: 10px 0;'>
+            <div style='background: linear-gradient(135deg, #4CAF50, #45a049); width: {fundamental_weight}%; display: flex; align-items: center; justify-content: center; color: white; font-size: 12px; font-weight: 600;'>
+                📊 {fundamental_weight}%
+            </div>
+            <div style='background: linear-gradient(135deg, #2196F3, #1976d2); width: {sentiment_weight}%; display: flex; align-items: center; justify-content: center; color: white; font-size: 12px; font-weight: 600;'>
+                🗞️ {sentiment_weight}%
+            </div>
+        </div>
+        <p style='margin: 5px 0 0 0; font-size: 0.9rem; opacity: 0.8;'>Fundamentals vs Sentiment</p>
+    </div>
+    """), unsafe_allow_html=True)
+    
+    # Long lists (8+ stocks) get one compact table (a single element) and full
+    # cards only for the top picks, since every card is a stack of layout elements
+    compact = len(results_sorted) >= COMPACT_TABLE_MIN_RESULTS
+    card_results = results_sorted[:DETAILED_CARD_LIMIT] if compact else results_sorted
+    if compact:
+        st.dataframe(
+            [
+                {
+                    'Rank': i+1,
+                    'Ticker': r['ticker'],
+                    'Company': r['company_name'],
+                    'Recommendation': f"{BADGE.get(r['recommendation'], BADGE['SELL'])[2]} {r['recommendation']}",
+                    'Score': r['overall_score'],
+                    # Strings throughout, as these columns mix numbers and 'N/A'
+                    'PE Ratio': str(format_metric(r.get('pe_ratio', 'N/A'))),
+                    'Sentiment': str(format_metric(r.get('avg_sentiment', 'N/A')))
+                }
+                for i, r in enumerate(results_sorted)
+            ],
+            use_container_width=True,
+            hide_index=True
+        )
+        st.markdown(f"Click each of the top {DETAILED_CARD_LIMIT} stocks to see full analysis details")
+    else:
+        st.markdown("Click each stock to see full analysis details")
+    
+    for i, result in enumerate(card_results):
         # Recommendation badge styling
-        if result['recommendation'] == 'BUY':
-            badge_color = '#4CAF50'
-            badge_bg = 'linear-gradient(135deg, #4CAF50, #45a049)'
-            badge_emoji = '✅'
-        elif result['recommendation'] == 'HOLD':
-            badge_color = '#FF9800'
-            badge_bg = 'linear-gradient(135deg, #FF9800, #f57c00)'
-            badge_emoji = '⚠️'
-        else:
-            badge_color = '#f44336'
-            badge_bg = 'linear-gradient(135deg, #f44336, #d32f2f)'
-            badge_emoji = '❌'
+        badge_color, badge_bg, badge_emoji = BADGE.get(result['recommendation'], BADGE['SELL'])
         
         # Create expandable card with improved styling
         with st.expander(f"#{i+1} {result['ticker']} - {result['company_name']}", expanded=(i==0)):
@@ -630,68 +787,41 @@ def display_results(results, fundamental_weight, sentiment_weight):
             </div>
             """, unsafe_allow_html=True)
             
-            # Analysis breakdown with improved readability
-            col1, col2, col3 = st.columns(3)
+            # Analysis breakdown with improved readability; one markdown call
+            # per column (heading + HTML) keeps the delta count per card low
+            col1, col2 = st.columns(2)
             
             with col1:
-                st.markdown("#### ⚖️ Analysis Balance")
-                fund_pct = fundamental_weight
-                sent_pct = sentiment_weight
-                
-                st.markdown(f"""
-                <div style='background: rgba(255,255,255,0.1); padding: 15px; border-radius: 10px; margin: 10px 0;'>
-                    <div style='display: flex; height: 25px; border-radius: 12px; overflow: hidden; margin: 10px 0;'>
-                        <div style='background: linear-gradient(135deg, #4CAF50, #45a049); width: {fund_pct}%; display: flex; align-items: center; justify-content: center; color: white; font-size: 12px; font-weight: 600;'>
-                            📊 {fund_pct}%
-                        </div>
-                        <div style='background: linear-gradient(135deg, #2196F3, #1976d2); width: {sent_pct}%; display: flex; align-items: center; justify-content: center; color: white; font-size: 12px; font-weight: 600;'>
-                            🗞️ {sent_pct}%
-                        </div>
-                    </div>
-                    <p style='margin: 5px 0 0 0; font-size: 0.9rem; opacity: 0.8;'>Fundamentals vs Sentiment</p>
-                </div>
-                """, unsafe_allow_html=True)
-            
-            with col2:
-                st.markdown("#### 📊 Fundamental Score")
                 fund_score = result.get('fundamental_score', 50)
-                fund_color = '#4CAF50' if fund_score >= 70 else '#FF9800' if fund_score >= 50 else '#f44336'
-                
-                st.markdown(f"""
+                st.markdown("#### 📊 Fundamental Score\n\n" + dedent(f"""
                 <div style='background: rgba(255,255,255,0.1); padding: 15px; border-radius: 10px; margin: 10px 0; text-align: center;'>
-                    <h3 style='margin: 0; color: {fund_color}; font-size: 2rem;'>{fund_score:.1f}</h3>
+                    <h3 style='margin: 0; color: {fund_colors[i]}; font-size: 2rem;'>{fund_score:.1f}</h3>
                     <p style='margin: 5px 0 0 0; font-size: 0.9rem; opacity: 0.8;'>Financial Health</p>
                 </div>
-                """, unsafe_allow_html=True)
+                """), unsafe_allow_html=True)
             
-            with col3:
-                st.markdown("#### 🗞️ Sentiment Score")
+            with col2:
                 sent_score = result.get('sentiment_score', 50)
-                sent_color = '#4CAF50' if sent_score >= 70 else '#FF9800' if sent_score >= 50 else '#f44336'
-                
-                st.markdown(f"""
+                st.markdown("#### 🗞️ Sentiment Score\n\n" + dedent(f"""
                 <div style='background: rgba(255,255,255,0.1); padding: 15px; border-radius: 10px; margin: 10px 0; text-align: center;'>
-                    <h3 style='margin: 0; color: {sent_color}; font-size: 2rem;'>{sent_score:.1f}</h3>
+                    <h3 style='margin: 0; color: {sent_colors[i]}; font-size: 2rem;'>{sent_score:.1f}</h3>
                     <p style='margin: 5px 0 0 0; font-size: 0.9rem; opacity: 0.8;'>Market Sentiment</p>
                 </div>
-                """, unsafe_allow_html=True)
+                """), unsafe_allow_html=True)
             
-            # Summary reasoning with better formatting
-            st.markdown("#### 💡 AI Analysis Summary")
+            # Summary reasoning with better formatting, followed by the divider
+            # above the detailed metrics
             reasoning = result.get('reasoning', 'Analysis completed successfully')
-            st.markdown(f"""
+            st.markdown("#### 💡 AI Analysis Summary\n\n" + dedent(f"""
             <div style='background: rgba(255,255,255,0.05); padding: 20px; border-radius: 10px; border-left: 4px solid {badge_color}; margin: 15px 0;'>
                 <p style='margin: 0; font-size: 1rem; line-height: 1.6; color: var(--text-color);'>{reasoning}</p>
             </div>
-            """, unsafe_allow_html=True)
+            """) + "\n---", unsafe_allow_html=True)
             
             # Detailed metrics in organized sections
-            st.markdown("---")
             detail_col1, detail_col2 = st.columns(2)
             
             with detail_col1:
-                st.markdown("#### 📊 Financial Metrics")
-                
                 metrics = [
                     ("PE Ratio", result.get('pe_ratio', 'N/A')),
                     ("PB Ratio", result.get('pb_ratio', 'N/A')), 
@@ -700,38 +830,24 @@ def display_results(results, fundamental_weight, sentiment_weight):
                     ("Current Price", f"₹{result.get('current_price', 'N/A')}")
                 ]
                 
-                for label, value in metrics:
-                    if value != 'N/A' and value is not None:
-                        if isinstance(value, float) and abs(value) < 1:
-                            value = f"{value:.3f}"
-                        elif isinstance(value, float):
-                            value = f"{value:.2f}"
-                    
-                    st.markdown(f"""
-                    <div style='display: flex; justify-content: space-between; padding: 8px 0; border-bottom: 1px solid rgba(255,255,255,0.1);'>
-                        <span style='font-weight: 600;'>{label}:</span>
-                        <span style='color: var(--text-color);'>{value}</span>
-                    </div>
-                    """, unsafe_allow_html=True)
+                st.markdown("#### 📊 Financial Metrics\n\n" + "".join(
+                    METRIC_ROW_HTML.format(label=label, value=format_metric(value))
+                    for label, value in metrics
+                ), unsafe_allow_html=True)
             
             with detail_col2:
-                st.markdown("#### 📰 News Analysis")
-                
                 sentiment_metrics = [
-                    ("Sentiment Score", f"{result.get('avg_sentiment', 'N/A')}"),
+                    ("Sentiment Score", result.get('avg_sentiment', 'N/A')),
                     ("Positive News", f"{result.get('positive_count', 0)} articles"),
                     ("Negative News", f"{result.get('negative_count', 0)} articles"),
                     ("Total Coverage", f"{result.get('total_articles', 0)} articles"),
                     ("News Quality", "Real-time data")
                 ]
                 
-                for label, value in sentiment_metrics:
-                    st.markdown(f"""
-                    <div style='display: flex; justify-content: space-between; padding: 8px 0; border-bottom: 1px solid rgba(255,255,255,0.1);'>
-                        <span style='font-weight: 600;'>{label}:</span>
-                        <span style='color: var(--text-color);'>{value}</span>
-                    </div>
-                    """, unsafe_allow_html=True)
+                st.markdown("#### 📰 News Analysis\n\n" + "".join(
+                    METRIC_ROW_HTML.format(label=label, value=format_metric(value))
+                    for label, value in sentiment_metrics
+                ), unsafe_allow_html=True)
     
     st.markdown("</div>", unsafe_allow_html=True)
     
@@ -740,21 +856,16 @@ def display_results(results, fundamental_weight, sentiment_weight):
     col1, col2, col3 = st.columns(3)
     
     with col1:
-        # Download CSV
-        df_export = pd.DataFrame([{
-            'Rank': i+1,
-            'Ticker': r['ticker'],
-            'Company': r['company_name'],
-            'Recommendation': r['recommendation'],
-            'Score': r['overall_score'],
-            'PE_Ratio': r.get('pe_ratio', 'N/A'),
-            'Sentiment': r.get('avg_sentiment', 'N/A')
-        } for i, r in enumerate(results_sorted)])
+        # Download CSV, encoded once per distinct result set rather than every rerun
+        csv_bytes = build_csv(tuple(
+            (i+1, r['ticker'], r['company_name'], r['recommendation'], r['overall_score'],
+             r.get('pe_ratio', 'N/A'), r.get('avg_sentiment', 'N/A'))
+            for i, r in enumerate(results_sorted)
+        ))
         
-        csv = df_export.to_csv(index=False)
         st.download_button(
             "📥 Download CSV",
-            data=csv,
+            data=csv_bytes,
             file_name=f"stock_analysis_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
             mime="text/csv",
             use_container_width=True
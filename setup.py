@@ -4,6 +4,7 @@ Setup script for AI Stock Advisor
 This script helps set up the project environment and dependencies
 """
 
+import shlex
 import subprocess
 import sys
 import os
@@ -12,7 +13,11 @@ def run_command(command, description):
     """Run a shell command and handle errors"""
     print(f"📦 {description}...")
     try:
-        result = subprocess.run(command, shell=True, check=True, capture_output=True, text=True)
+        # Only stderr is needed (for the failure message), so stdout is discarded
+        subprocess.run(
+            command, shell=True, check=True,
+            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True
+        )
         print(f"✅ {description} completed successfully")
         return True
     except subprocess.CalledProcessError as e:
@@ -27,7 +32,7 @@ def install_dependencies():
         "numpy>=1.24.0",
         "yfinance>=0.2.0",
         "requests>=2.31.0",
-        "beautifulsoup4>=4.12.0",
+        "lxml>=5.2.0",
         "trafilatura>=1.6.0",
         "nltk>=3.8.0",
         "spacy>=3.7.0",
@@ -35,11 +40,13 @@ def install_dependencies():
         "python-dateutil>=2.8.0"
     ]
     
-    for package in packages:
-        if not run_command(f"pip install {package}", f"Installing {package.split('>=')[0]}"):
-            return False
-    
-    return True
+    # One pip run so the resolver sees the whole set at once; specs are quoted
+    # since the shell would otherwise treat '>' as a redirect. --prefer-binary
+    # takes a slightly older wheel over compiling a newer sdist (numpy, spaCy...)
+    return run_command(
+        "pip install --prefer-binary " + " ".join(shlex.quote(package) for package in packages),
+        "Installing dependencies"
+    )
 
 def setup_spacy():
     """Download the required spaCy model"""
@@ -50,9 +57,21 @@ def setup_nltk():
     try:
         print("📦 Setting up NLTK data...")
         import nltk
-        nltk.download('vader_lexicon', quiet=True)
-        nltk.download('punkt', quiet=True)
-        nltk.download('stopwords', quiet=True)
+        
+        # Only fetch what is missing, in a single downloader call
+        missing = []
+        for resource, package in (
+            ('sentiment/vader_lexicon.zip', 'vader_lexicon'),
+            ('tokenizers/punkt', 'punkt'),
+            ('corpora/stopwords', 'stopwords')
+        ):
+            try:
+                nltk.data.find(resource)
+            except LookupError:
+                missing.append(package)
+        
+        if missing:
+            nltk.download(missing, quiet=True, raise_on_error=True)
         print("✅ NLTK data setup completed")
         return True
     except Exception as e:
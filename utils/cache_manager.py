@@ -1,20 +1,95 @@
-import time
+import atexit
+import functools
+import hashlib
 import json
+import sqlite3
+import time
 import os
+import threading
+from collections import OrderedDict
 from typing import Dict, Any, Optional
 from datetime import datetime
 
+# msgpack is optional: a compact binary encoding that is much faster than JSON,
+# with JSON used for cached data when it is missing. Each encoding gets its
+# own database file so the two never read each other's blobs.
+try:
+    import msgpack
+    
+    def _dumps(obj: Any) -> bytes:
+        """Encode cached data (unknown types stored as strings, as with JSON)"""
+        return msgpack.packb(obj, use_bin_type=True, default=str)
+    
+    def _loads(raw: bytes) -> Any:
+        """Decode cached data"""
+        return msgpack.unpackb(raw, raw=False, strict_map_key=False)
+    
+    CACHE_DB_NAME = 'cache_msgpack.db'
+except ImportError:
+    def _dumps(obj: Any) -> bytes:
+        """Encode cached data"""
+        return json.dumps(obj, default=str).encode('utf-8')
+    
+    _loads = json.loads
+    CACHE_DB_NAME = 'cache_json.db'
+
+# Entries keyed by cache key, with an index on expiry time so cleanup is a
+# single range delete; stats holds per-key access counts for adaptive TTLs
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, ts REAL NOT NULL, ttl INTEGER NOT NULL, data BLOB NOT NULL);
+CREATE INDEX IF NOT EXISTS cache_expiry ON cache (ts + ttl);
+CREATE TABLE IF NOT EXISTS stats (key TEXT PRIMARY KEY, hits INTEGER NOT NULL, last_access REAL NOT NULL, refreshes INTEGER NOT NULL);
+"""
+
 class CacheManager:
     """Manages caching for API calls and web scraping to reduce load"""
     
-    def __init__(self, cache_dir: str = ".cache"):
+    # Bounds for adaptive TTLs (entries set without an explicit ttl)
+    MIN_TTL = 60       # 1 minute
+    MAX_TTL = 86400    # 1 day
+    
+    def __init__(self, cache_dir: str = ".cache", flush_interval: float = 5.0, max_entries: int = 10_000):
         self.cache_dir = cache_dir
-        self.memory_cache = {}
         self.default_ttl = 3600  # 1 hour default TTL
         
+        # LRU-ordered memory cache, capped at max_entries (least recently used
+        # entries are evicted; they remain available from the database)
+        self.memory_cache = OrderedDict()
+        self.max_entries = max_entries
+        
         # Create cache directory if it doesn't exist
         if not os.path.exists(self.cache_dir):
             os.makedirs(self.cache_dir)
+        
+        # Persistent entries live in one SQLite database (WAL mode, so reads
+        # don't block the flusher's writes). The connection is shared across
+        # threads and serialized by _db_lock, which is never taken while
+        # holding _lock.
+        self._db_path = os.path.join(self.cache_dir, CACHE_DB_NAME)
+        self._db_lock = threading.Lock()
+        created = not os.path.exists(self._db_path)
+        self._conn = self._open_db()
+        if created:
+            self._remove_legacy_files()
+        
+        # Write-behind: set() only records the entry here and a background
+        # thread persists pending entries every flush_interval seconds, so a
+        # burst of sets costs one batched transaction rather than a write per call
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._flush_interval = flush_interval
+        self._stop = threading.Event()
+        
+        # key -> {'hits', 'last_access', 'refreshes'}; keys changed since the
+        # last flush are written back along with the pending entries
+        self._stats = self._load_stats()
+        self._dirty_stats = set()
+        
+        self._flusher = threading.Thread(target=self._flush_loop, name="cache-flush", daemon=True)
+        self._flusher.start()
+        
+        # Persist whatever is still pending when the process exits
+        atexit.register(self.close)
     
     def get(self, key: str, ttl: Optional[int] = None) -> Optional[Any]:
         """
@@ -29,33 +104,45 @@ class CacheManager:
         """
         try:
             # Check memory cache first
-            if key in self.memory_cache:
-                cache_entry = self.memory_cache[key]
+            cache_entry = self.memory_cache.get(key)
+            if cache_entry is not None:
                 if self._is_valid(cache_entry, ttl):
+                    with self._lock:
+                        if key in self.memory_cache:
+                            self.memory_cache.move_to_end(key)
+                        self._record_hit(key)
                     return cache_entry['data']
                 else:
                     # Remove expired entry
-                    del self.memory_cache[key]
+                    with self._lock:
+                        self.memory_cache.pop(key, None)
             
-            # Check file cache
-            file_path = self._get_cache_file_path(key)
-            if os.path.exists(file_path):
-                try:
-                    with open(file_path, 'r', encoding='utf-8') as f:
-                        cache_entry = json.load(f)
-                    
-                    if self._is_valid(cache_entry, ttl):
-                        # Load back to memory cache
-                        self.memory_cache[key] = cache_entry
-                        return cache_entry['data']
-                    else:
-                        # Remove expired file
-                        os.remove(file_path)
-                except (json.JSONDecodeError, KeyError):
-                    # Remove corrupted cache file
-                    os.remove(file_path)
+            # An entry evicted from memory before the flusher wrote it is still pending
+            cache_entry = self._pending.get(key)
+            if cache_entry is not None and self._is_valid(cache_entry, ttl):
+                with self._lock:
+                    self._record_hit(key)
+                return cache_entry['data']
             
-            return None
+            # Check the database
+            with self._db_lock:
+                row = self._conn.execute("SELECT ts, ttl, data FROM cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            
+            timestamp, entry_ttl, blob = row
+            cache_entry = {'timestamp': timestamp, 'ttl': entry_ttl}
+            if not self._is_valid(cache_entry, ttl):
+                # Remove expired entry
+                self._delete_rows(key)
+                return None
+            
+            # Load back to memory cache
+            cache_entry['data'] = _loads(blob)
+            with self._lock:
+                self._remember(key, cache_entry)
+                self._record_hit(key)
+            return cache_entry['data']
             
         except Exception as e:
             print(f"Cache get error for key {key}: {e}")
@@ -68,28 +155,41 @@ class CacheManager:
         Args:
             key: Cache key
             data: Data to cache
-            ttl: Time to live in seconds (uses default if None)
+            ttl: Time to live in seconds; if None it adapts to the key's history,
+                starting at the default and growing with reads, shrinking with
+                overwrites made before expiry
             
         Returns:
             True if successful, False otherwise
         """
         try:
-            if ttl is None:
-                ttl = self.default_ttl
+            now = time.time()
+            
+            with self._lock:
+                # Overwriting an entry that has not expired yet counts as a
+                # refresh; only in-memory state is checked, so set() never
+                # waits on the database
+                previous = self.memory_cache.get(key) or self._pending.get(key)
+                refreshed = previous is not None and self._is_valid(previous)
+                
+                stats = self._stats.setdefault(key, {'hits': 0, 'last_access': now, 'refreshes': 0})
+                if refreshed:
+                    stats['refreshes'] += 1
+                self._dirty_stats.add(key)
+                
+                if ttl is None:
+                    ttl = self._adaptive_ttl(stats)
             
             cache_entry = {
                 'data': data,
-                'timestamp': time.time(),
+                'timestamp': now,
                 'ttl': ttl
             }
             
-            # Store in memory cache
-            self.memory_cache[key] = cache_entry
-            
-            # Store in file cache for persistence
-            file_path = self._get_cache_file_path(key)
-            with open(file_path, 'w', encoding='utf-8') as f:
-                json.dump(cache_entry, f, default=str, indent=2)
+            # Store in memory cache; the database write is deferred to the flusher
+            with self._lock:
+                self._remember(key, cache_entry)
+                self._pending[key] = cache_entry
             
             return True
             
@@ -108,14 +208,14 @@ class CacheManager:
             True if successful
         """
         try:
-            # Remove from memory cache
-            if key in self.memory_cache:
-                del self.memory_cache[key]
+            # Remove from memory cache (and drop any unwritten entry)
+            with self._lock:
+                self.memory_cache.pop(key, None)
+                self._stats.pop(key, None)
+                self._dirty_stats.discard(key)
             
-            # Remove from file cache
-            file_path = self._get_cache_file_path(key)
-            if os.path.exists(file_path):
-                os.remove(file_path)
+            # Remove from the database
+            self._delete_rows(key, with_stats=True)
             
             return True
             
@@ -126,14 +226,20 @@ class CacheManager:
     def clear_all(self) -> bool:
         """Clear all cached data"""
         try:
-            # Clear memory cache
-            self.memory_cache.clear()
-            
-            # Clear file cache
-            for filename in os.listdir(self.cache_dir):
-                if filename.endswith('.json'):
-                    file_path = os.path.join(self.cache_dir, filename)
-                    os.remove(file_path)
+            # Hold the database lock throughout so an in-flight flush can't
+            # write back entries swapped out before the clear
+            with self._db_lock:
+                # Clear memory cache (and drop any unwritten entries)
+                with self._lock:
+                    self.memory_cache.clear()
+                    self._pending.clear()
+                    self._stats.clear()
+                    self._dirty_stats.clear()
+                
+                # Clear the database
+                with self._conn:
+                    self._conn.execute("DELETE FROM cache")
+                    self._conn.execute("DELETE FROM stats")
             
             return True
             
@@ -152,31 +258,37 @@ class CacheManager:
         
         try:
             # Clean memory cache
-            expired_keys = []
-            for key, cache_entry in self.memory_cache.items():
-                if not self._is_valid(cache_entry):
-                    expired_keys.append(key)
-            
-            for key in expired_keys:
-                del self.memory_cache[key]
-                cleaned_count += 1
-            
-            # Clean file cache
-            for filename in os.listdir(self.cache_dir):
-                if filename.endswith('.json'):
-                    file_path = os.path.join(self.cache_dir, filename)
-                    try:
-                        with open(file_path, 'r', encoding='utf-8') as f:
-                            cache_entry = json.load(f)
-                        
-                        if not self._is_valid(cache_entry):
-                            os.remove(file_path)
-                            cleaned_count += 1
-                            
-                    except (json.JSONDecodeError, KeyError):
-                        # Remove corrupted files
-                        os.remove(file_path)
-                        cleaned_count += 1
+            with self._lock:
+                expired_keys = [
+                    key for key, cache_entry in self.memory_cache.items()
+                    if not self._is_valid(cache_entry)
+                ]
+                for key in expired_keys:
+                    del self.memory_cache[key]
+                    self._pending.pop(key, None)
+                    cleaned_count += 1
+            
+            # Clean the database with one range delete over the expiry index
+            now = time.time()
+            with self._db_lock:
+                with self._conn:
+                    cleaned_count += self._conn.execute("DELETE FROM cache WHERE ts + ttl <= ?", (now,)).rowcount
+                live_keys = {key for (key,) in self._conn.execute("SELECT key FROM cache")}
+            
+            # Forget access stats for keys that are gone and idle past the longest TTL
+            with self._lock:
+                stale_keys = [
+                    key for key, stats in self._stats.items()
+                    if key not in live_keys and key not in self._pending
+                    and now - stats['last_access'] >= self.MAX_TTL
+                ]
+                for key in stale_keys:
+                    del self._stats[key]
+                    self._dirty_stats.discard(key)
+            
+            if stale_keys:
+                with self._db_lock, self._conn:
+                    self._conn.executemany("DELETE FROM stats WHERE key = ?", [(key,) for key in stale_keys])
             
             return cleaned_count
             
@@ -189,25 +301,153 @@ class CacheManager:
         try:
             memory_count = len(self.memory_cache)
             
-            file_count = 0
-            total_file_size = 0
-            
-            for filename in os.listdir(self.cache_dir):
-                if filename.endswith('.json'):
-                    file_count += 1
-                    file_path = os.path.join(self.cache_dir, filename)
-                    total_file_size += os.path.getsize(file_path)
+            with self._db_lock:
+                disk_count, total_disk_size = self._conn.execute(
+                    "SELECT count(*), coalesce(sum(length(data)), 0) FROM cache"
+                ).fetchone()
             
             return {
                 'memory_entries': memory_count,
-                'file_entries': file_count,
-                'total_file_size_mb': round(total_file_size / (1024 * 1024), 2),
+                'pending_writes': len(self._pending),
+                'disk_entries': disk_count,
+                'total_disk_size_mb': round(total_disk_size / (1024 * 1024), 2),
                 'cache_directory': self.cache_dir
             }
             
         except Exception as e:
             return {'error': str(e)}
     
+    def flush(self) -> int:
+        """
+        Write all pending entries and changed access stats to the database
+        
+        Returns:
+            Number of entries written
+        """
+        # The swap happens under the database lock so that invalidate() and
+        # clear_all() are ordered after this batch rather than overwritten by it
+        with self._db_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+                stats_rows = [
+                    (key, stats['hits'], stats['last_access'], stats['refreshes'])
+                    for key, stats in ((key, self._stats.get(key)) for key in self._dirty_stats)
+                    if stats is not None
+                ]
+                self._dirty_stats = set()
+            
+            entry_rows = []
+            for key, cache_entry in pending.items():
+                try:
+                    entry_rows.append((key, cache_entry['timestamp'], cache_entry['ttl'], _dumps(cache_entry['data'])))
+                except Exception as e:
+                    print(f"Cache flush error for key {key}: {e}")
+            
+            if not entry_rows and not stats_rows:
+                return 0
+            
+            try:
+                # One transaction for the whole batch
+                with self._conn:
+                    self._conn.executemany(
+                        "INSERT OR REPLACE INTO cache (key, ts, ttl, data) VALUES (?, ?, ?, ?)", entry_rows
+                    )
+                    self._conn.executemany(
+                        "INSERT OR REPLACE INTO stats (key, hits, last_access, refreshes) VALUES (?, ?, ?, ?)", stats_rows
+                    )
+                return len(entry_rows)
+                
+            except Exception as e:
+                print(f"Cache flush error: {e}")
+                # Keep the batch for the next flush, without clobbering newer sets
+                with self._lock:
+                    for key, cache_entry in pending.items():
+                        self._pending.setdefault(key, cache_entry)
+                    self._dirty_stats.update(row[0] for row in stats_rows)
+                return 0
+    
+    def close(self):
+        """Stop the background flusher and write any pending entries"""
+        self._stop.set()
+        self.flush()
+    
+    def _flush_loop(self):
+        """Background thread body: flush pending entries every flush_interval seconds"""
+        while not self._stop.wait(self._flush_interval):
+            self.flush()
+    
+    def _remember(self, key: str, cache_entry: Dict):
+        """Insert into the memory cache as most recently used, evicting past max_entries (caller holds the lock)"""
+        self.memory_cache[key] = cache_entry
+        self.memory_cache.move_to_end(key)
+        while len(self.memory_cache) > self.max_entries:
+            self.memory_cache.popitem(last=False)
+    
+    def _record_hit(self, key: str):
+        """Count a cache hit towards the key's adaptive TTL (caller holds the lock)"""
+        stats = self._stats.setdefault(key, {'hits': 0, 'last_access': 0.0, 'refreshes': 0})
+        stats['hits'] += 1
+        stats['last_access'] = time.time()
+        self._dirty_stats.add(key)
+    
+    def _adaptive_ttl(self, stats: Dict) -> int:
+        """Default TTL scaled by reads per refresh, clamped to [MIN_TTL, MAX_TTL]"""
+        ttl = self.default_ttl * (stats['hits'] + 1) / (stats['refreshes'] + 1)
+        return int(min(max(ttl, self.MIN_TTL), self.MAX_TTL))
+    
+    def _open_db(self) -> sqlite3.Connection:
+        """Open the cache database, starting afresh if the file is not a usable database"""
+        for attempt in range(2):
+            conn = sqlite3.connect(self._db_path, check_same_thread=False)
+            try:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("PRAGMA synchronous=NORMAL")  # WAL stays consistent; only the last commits risk loss on power failure
+                conn.executescript(_SCHEMA)
+                return conn
+            except sqlite3.OperationalError:
+                # Locked or unreadable rather than corrupt: not ours to delete
+                conn.close()
+                raise
+            except sqlite3.DatabaseError:
+                conn.close()
+                if attempt:
+                    raise
+                os.remove(self._db_path)
+    
+    def _remove_legacy_files(self):
+        """Delete *.json entry files left in the cache directory by the old file-based cache"""
+        with os.scandir(self.cache_dir) as entries:
+            for entry in entries:
+                if not (entry.name.endswith('.json') and entry.is_file()):
+                    continue
+                try:
+                    with open(entry.path, 'r') as f:
+                        cache_entry = json.load(f)
+                    # Only files holding an old {data, timestamp, ttl} entry
+                    if isinstance(cache_entry, dict) and {'data', 'timestamp', 'ttl'} <= cache_entry.keys():
+                        os.remove(entry.path)
+                except (OSError, ValueError):
+                    pass
+    
+    def _load_stats(self) -> Dict[str, Dict]:
+        """Load the persisted access stats"""
+        with self._db_lock:
+            rows = self._conn.execute("SELECT key, hits, last_access, refreshes FROM stats").fetchall()
+        return {
+            key: {'hits': hits, 'last_access': last_access, 'refreshes': refreshes}
+            for key, hits, last_access, refreshes in rows
+        }
+    
+    def _delete_rows(self, key: str, with_stats: bool = False):
+        """Remove a stored entry (written or still pending), and optionally its access stats"""
+        with self._db_lock:
+            with self._lock:
+                self._pending.pop(key, None)
+            with self._conn:
+                self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+                if with_stats:
+                    self._conn.execute("DELETE FROM stats WHERE key = ?", (key,))
+    
     def _is_valid(self, cache_entry: Dict, ttl: Optional[int] = None) -> bool:
         """Check if cache entry is still valid"""
         try:
@@ -220,12 +460,6 @@ class CacheManager:
         except:
             return False
     
-    def _get_cache_file_path(self, key: str) -> str:
-        """Get file path for cache key"""
-        # Sanitize key for filename
-        safe_key = "".join(c for c in key if c.isalnum() or c in ('_', '-'))
-        return os.path.join(self.cache_dir, f"{safe_key}.json")
-    
     def cached_call(self, key: str, func, *args, ttl: Optional[int] = None, **kwargs):
         """
         Decorator-like function for caching function calls
@@ -256,3 +490,26 @@ class CacheManager:
             print(f"Cached call error for key {key}: {e}")
             # Fallback to direct function call
             return func(*args, **kwargs)
+    
+    def memoize(self, ttl: Optional[int] = None):
+        """
+        Decorator caching a function's results by its arguments
+        
+        The key is a hash of the function's qualified name and its arguments,
+        so callers don't have to build one; hot keys are served from the
+        in-memory LRU without touching the database. Arguments must have a stable repr.
+        
+        Args:
+            ttl: Cache TTL (adaptive if None)
+            
+        Returns:
+            Decorator wrapping the function
+        """
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                raw_key = repr((func.__qualname__, args, sorted(kwargs.items())))
+                key = f"memo_{hashlib.blake2b(raw_key.encode(), digest_size=16).hexdigest()}"
+                return self.cached_call(key, func, *args, ttl=ttl, **kwargs)
+            return wrapper
+        return decorator
@@ -1,5 +1,69 @@
+import bisect
+import math
+from types import MappingProxyType
+from typing import Dict, List, Any, Mapping, Optional, Union
+
 import numpy as np
-from typing import Dict, List, Any, Optional, Union
+
+# Numba is optional: without it the scalar kernel runs as a plain Python function
+try:
+    from numba import njit
+except ImportError:
+    def njit(*args, **kwargs):
+        """No-op stand-in for numba.njit"""
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
+
+# Fundamental metrics combined by normalize_fundamental_score(s), in weight order
+FUNDAMENTAL_FIELDS = ('pe_ratio', 'pb_ratio', 'roe', 'debt_to_equity', 'profit_margin', 'revenue_growth')
+
+def _ladder_table(thresholds, scores, side: str, slope: float = 0.0) -> tuple:
+    """Threshold table for _ladder_score: ascending thresholds and the len + 1 scores they bracket"""
+    return (np.asarray(thresholds, dtype=np.float64), np.asarray(scores, dtype=np.float64), side, float(slope))
+
+def _ladder_score(values, table: tuple):
+    """
+    Score value(s) against a threshold table with a single np.searchsorted.
+    
+    side='left' reproduces a '<=' ladder, side='right' a '>=' ladder. Past the
+    last threshold the score decays by slope per unit, floored at 0. NaN in,
+    NaN out, so arrays may carry missing values.
+    """
+    thresholds, scores, side, slope = table
+    values = np.asarray(values, dtype=np.float64)
+    position = np.searchsorted(thresholds, values, side=side)
+    return np.maximum(0.0, scores[position] - np.maximum(0.0, values - thresholds[-1]) * slope)
+
+# NOTE: no fastmath - it would let LLVM assume NaN never reaches the comparisons
+@njit(cache=True)
+def _ladder_kernel(value, thresholds, scores, right, slope):
+    """Compiled single-value _ladder_score (right selects side='right')"""
+    if right:
+        position = np.searchsorted(thresholds, value, side='right')
+    else:
+        position = np.searchsorted(thresholds, value, side='left')
+    return max(0.0, scores[position] - max(0.0, value - thresholds[-1]) * slope)
+
+def _ladder_value(value, table: tuple) -> float:
+    """Score one value against a threshold table via the compiled kernel"""
+    thresholds, scores, side, slope = table
+    return _ladder_kernel(float(value), thresholds, scores, side == 'right', slope)
+
+def _as_decimal(values: np.ndarray) -> np.ndarray:
+    """Convert ratios given as percentages (15) to decimals (0.15), leaving decimals as-is"""
+    return np.where(values <= 1, values, values / 100)
+
+# Score interpretations, from lowest to highest; a score at or above a
+# threshold gets the next grade up (bisect_right keeps 85 an A, 84.9 a B)
+SCORE_GRADE_THRESHOLDS = (40, 55, 70, 85)
+SCORE_GRADES = tuple(MappingProxyType(grade) for grade in (
+    {'grade': 'F', 'description': 'Very Poor', 'color': 'red', 'recommendation': 'Sell'},
+    {'grade': 'D', 'description': 'Poor', 'color': 'orange', 'recommendation': 'Consider Selling'},
+    {'grade': 'C', 'description': 'Fair', 'color': 'yellow', 'recommendation': 'Hold'},
+    {'grade': 'B', 'description': 'Good', 'color': 'lightgreen', 'recommendation': 'Buy'},
+    {'grade': 'A', 'description': 'Excellent', 'color': 'green', 'recommendation': 'Strong Buy'}
+))
 
 class DataNormalizer:
     """Utility class for normalizing and scaling data across different agents"""
@@ -21,6 +85,26 @@ class DataNormalizer:
             'negative': -0.1,
             'very_negative': -0.5
         }
+        
+        # Score ladders as threshold tables, built once from the benchmarks.
+        # The ROE/margin floor is nudged above 0 so only strictly positive values score 20.
+        pe, pb, roe, de, margin = (
+            [self.fundamental_benchmarks[metric][level] for level in ('excellent', 'good', 'fair', 'poor')]
+            for metric in ('pe_ratio', 'pb_ratio', 'roe', 'debt_to_equity', 'profit_margin')
+        )
+        positive = np.nextafter(0.0, 1.0)
+        self._pe_table = _ladder_table(pe, [100, 85, 65, 40, 40], 'left', slope=2)
+        self._pb_table = _ladder_table(pb, [100, 80, 60, 30, 30], 'left', slope=5)
+        self._roe_table = _ladder_table([positive, *roe[::-1]], [0, 20, 40, 65, 85, 100], 'right')
+        self._debt_table = _ladder_table(de, [100, 80, 60, 40, 40], 'left', slope=10)
+        self._margin_table = _ladder_table([positive, *margin[::-1]], [0, 20, 40, 65, 85, 100], 'right')
+        self._growth_table = _ladder_table([-0.10, -0.05, 0, 0.05, 0.10, 0.20, 0.30], [0, 25, 40, 50, 60, 75, 90, 100], 'right')
+        self._coverage_table = _ladder_table([1, 2, 5, 10, 15], [20, 40, 55, 70, 85, 100], 'right')
+        self._ratio_table = _ladder_table([0.2, 0.4, 0.6, 0.8], [20, 40, 60, 80, 100], 'right')
+        self._consistency_table = _ladder_table([0.1, 0.2, 0.3, 0.5], [100, 80, 60, 40, 20], 'left')
+        
+        # Weights of FUNDAMENTAL_FIELDS
+        self._fundamental_weights = np.array([0.20, 0.15, 0.25, 0.15, 0.15, 0.10])
     
     def normalize_fundamental_score(self, fundamental_data: Dict) -> float:
         """
@@ -36,57 +120,63 @@ class DataNormalizer:
             if not fundamental_data or fundamental_data.get('error'):
                 return 50.0  # Neutral score for missing data
             
-            score = 0.0
-            total_weight = 0.0
-            
-            # PE Ratio (Weight: 20%)
-            pe_score = self._normalize_pe_ratio(fundamental_data.get('pe_ratio'))
-            if pe_score is not None:
-                score += pe_score * 0.20
-                total_weight += 0.20
-            
-            # PB Ratio (Weight: 15%)
-            pb_score = self._normalize_pb_ratio(fundamental_data.get('pb_ratio'))
-            if pb_score is not None:
-                score += pb_score * 0.15
-                total_weight += 0.15
-            
-            # ROE (Weight: 25%)
-            roe_score = self._normalize_roe(fundamental_data.get('roe'))
-            if roe_score is not None:
-                score += roe_score * 0.25
-                total_weight += 0.25
-            
-            # Debt to Equity (Weight: 15%)
-            debt_score = self._normalize_debt_to_equity(fundamental_data.get('debt_to_equity'))
-            if debt_score is not None:
-                score += debt_score * 0.15
-                total_weight += 0.15
-            
-            # Profit Margin (Weight: 15%)
-            margin_score = self._normalize_profit_margin(fundamental_data.get('profit_margin'))
-            if margin_score is not None:
-                score += margin_score * 0.15
-                total_weight += 0.15
-            
-            # Revenue Growth (Weight: 10%)
-            growth_score = self._normalize_revenue_growth(fundamental_data.get('revenue_growth'))
-            if growth_score is not None:
-                score += growth_score * 0.10
-                total_weight += 0.10
-            
-            # Normalize by actual weight used
-            if total_weight > 0:
-                final_score = (score / total_weight) * 100
-            else:
-                final_score = 50.0  # Default neutral score
-            
-            return max(0, min(100, final_score))
+            scores = self._score_row(fundamental_data)
+            return float(self._weighted_fundamental_scores(scores[np.newaxis])[0])
             
         except Exception as e:
             print(f"Error normalizing fundamental score: {e}")
             return 50.0
     
+    def normalize_fundamental_scores(self, arrays: Dict[str, np.ndarray]) -> np.ndarray:
+        """
+        Normalize fundamental data for many stocks at once
+        
+        Vectorized normalize_fundamental_score: each metric is scored with one
+        searchsorted over the whole column and the weighted sum is a matrix product.
+        
+        Args:
+            arrays: Metric name (see FUNDAMENTAL_FIELDS) -> per-stock values, NaN
+                where unavailable (a dict of arrays or a DataFrame); metrics left
+                out count as unavailable
+            
+        Returns:
+            Array of normalized scores between 0-100
+        """
+        columns = [np.asarray(arrays.get(field, np.nan), dtype=np.float64) for field in FUNDAMENTAL_FIELDS]
+        pe, pb, roe, debt, margin, growth = np.broadcast_arrays(*np.atleast_1d(*columns))
+        
+        scores = np.column_stack([
+            _ladder_score(np.where(pe > 0, pe, np.nan), self._pe_table),
+            _ladder_score(np.where(pb > 0, pb, np.nan), self._pb_table),
+            _ladder_score(_as_decimal(roe), self._roe_table),
+            _ladder_score(debt, self._debt_table),
+            _ladder_score(_as_decimal(margin), self._margin_table),
+            _ladder_score(np.where(np.abs(growth) <= 1, growth, growth / 100), self._growth_table)
+        ])
+        
+        return self._weighted_fundamental_scores(scores)
+    
+    def _score_row(self, fundamental_data: Dict) -> np.ndarray:
+        """Sub-scores of FUNDAMENTAL_FIELDS for one stock, NaN where unavailable"""
+        sub_scores = (
+            self._normalize_pe_ratio(fundamental_data.get('pe_ratio')),
+            self._normalize_pb_ratio(fundamental_data.get('pb_ratio')),
+            self._normalize_roe(fundamental_data.get('roe')),
+            self._normalize_debt_to_equity(fundamental_data.get('debt_to_equity')),
+            self._normalize_profit_margin(fundamental_data.get('profit_margin')),
+            self._normalize_revenue_growth(fundamental_data.get('revenue_growth'))
+        )
+        return np.array([np.nan if score is None else score for score in sub_scores])
+    
+    def _weighted_fundamental_scores(self, scores: np.ndarray) -> np.ndarray:
+        """Combine a (stocks x FUNDAMENTAL_FIELDS) sub-score matrix, normalizing by the weight of the metrics available"""
+        available = ~np.isnan(scores)
+        total_weight = available @ self._fundamental_weights
+        weighted = np.where(available, scores, 0.0) @ self._fundamental_weights
+        final_scores = np.divide(weighted, total_weight, out=np.full_like(weighted, 0.5), where=total_weight > 0) * 100
+        
+        return np.clip(final_scores, 0, 100)
+    
     def normalize_sentiment_score(self, sentiment_data: Dict) -> float:
         """
         Normalize sentiment data to a 0-100 score
@@ -134,141 +224,55 @@ class DataNormalizer:
     
     def _normalize_pe_ratio(self, pe_ratio: Optional[float]) -> Optional[float]:
         """Normalize PE ratio to 0-100 scale"""
-        if pe_ratio is None or pe_ratio <= 0:
+        if pe_ratio is None or not math.isfinite(pe_ratio) or pe_ratio <= 0:
             return None
         
-        benchmarks = self.fundamental_benchmarks['pe_ratio']
-        
-        if pe_ratio <= benchmarks['excellent']:
-            return 100
-        elif pe_ratio <= benchmarks['good']:
-            return 85
-        elif pe_ratio <= benchmarks['fair']:
-            return 65
-        elif pe_ratio <= benchmarks['poor']:
-            return 40
-        else:
-            return max(0, 40 - (pe_ratio - benchmarks['poor']) * 2)
+        return _ladder_value(pe_ratio, self._pe_table)
     
     def _normalize_pb_ratio(self, pb_ratio: Optional[float]) -> Optional[float]:
         """Normalize PB ratio to 0-100 scale"""
-        if pb_ratio is None or pb_ratio <= 0:
+        if pb_ratio is None or not math.isfinite(pb_ratio) or pb_ratio <= 0:
             return None
         
-        benchmarks = self.fundamental_benchmarks['pb_ratio']
-        
-        if pb_ratio <= benchmarks['excellent']:
-            return 100
-        elif pb_ratio <= benchmarks['good']:
-            return 80
-        elif pb_ratio <= benchmarks['fair']:
-            return 60
-        elif pb_ratio <= benchmarks['poor']:
-            return 30
-        else:
-            return max(0, 30 - (pb_ratio - benchmarks['poor']) * 5)
+        return _ladder_value(pb_ratio, self._pb_table)
     
     def _normalize_roe(self, roe: Optional[float]) -> Optional[float]:
         """Normalize ROE to 0-100 scale"""
-        if roe is None:
+        if roe is None or not math.isfinite(roe):
             return None
         
         # Handle both decimal (0.15) and percentage (15) formats
         roe_value = roe if roe <= 1 else roe / 100
-        benchmarks = self.fundamental_benchmarks['roe']
-        
-        if roe_value >= benchmarks['excellent']:
-            return 100
-        elif roe_value >= benchmarks['good']:
-            return 85
-        elif roe_value >= benchmarks['fair']:
-            return 65
-        elif roe_value >= benchmarks['poor']:
-            return 40
-        elif roe_value > 0:
-            return 20
-        else:
-            return 0
+        return _ladder_value(roe_value, self._roe_table)
     
     def _normalize_debt_to_equity(self, debt_to_equity: Optional[float]) -> Optional[float]:
         """Normalize Debt-to-Equity ratio to 0-100 scale (lower is better)"""
-        if debt_to_equity is None:
+        if debt_to_equity is None or not math.isfinite(debt_to_equity):
             return None
         
-        benchmarks = self.fundamental_benchmarks['debt_to_equity']
-        
-        if debt_to_equity <= benchmarks['excellent']:
-            return 100
-        elif debt_to_equity <= benchmarks['good']:
-            return 80
-        elif debt_to_equity <= benchmarks['fair']:
-            return 60
-        elif debt_to_equity <= benchmarks['poor']:
-            return 40
-        else:
-            return max(0, 40 - (debt_to_equity - benchmarks['poor']) * 10)
+        return _ladder_value(debt_to_equity, self._debt_table)
     
     def _normalize_profit_margin(self, profit_margin: Optional[float]) -> Optional[float]:
         """Normalize profit margin to 0-100 scale"""
-        if profit_margin is None:
+        if profit_margin is None or not math.isfinite(profit_margin):
             return None
         
         # Handle both decimal (0.15) and percentage (15) formats
         margin_value = profit_margin if profit_margin <= 1 else profit_margin / 100
-        benchmarks = self.fundamental_benchmarks['profit_margin']
-        
-        if margin_value >= benchmarks['excellent']:
-            return 100
-        elif margin_value >= benchmarks['good']:
-            return 85
-        elif margin_value >= benchmarks['fair']:
-            return 65
-        elif margin_value >= benchmarks['poor']:
-            return 40
-        elif margin_value > 0:
-            return 20
-        else:
-            return 0
+        return _ladder_value(margin_value, self._margin_table)
     
     def _normalize_revenue_growth(self, revenue_growth: Optional[float]) -> Optional[float]:
-        """Normalize revenue growth to 0-100 scale"""
-        if revenue_growth is None:
+        """Normalize revenue growth to 0-100 scale (30%+ growth scores 100, declines past 10% score 0)"""
+        if revenue_growth is None or not math.isfinite(revenue_growth):
             return None
         
         # Handle both decimal (0.15) and percentage (15) formats
         growth_value = revenue_growth if abs(revenue_growth) <= 1 else revenue_growth / 100
-        
-        if growth_value >= 0.30:  # 30%+ growth
-            return 100
-        elif growth_value >= 0.20:  # 20%+ growth
-            return 90
-        elif growth_value >= 0.10:  # 10%+ growth
-            return 75
-        elif growth_value >= 0.05:  # 5%+ growth
-            return 60
-        elif growth_value >= 0:     # Positive growth
-            return 50
-        elif growth_value >= -0.05: # Small decline
-            return 40
-        elif growth_value >= -0.10: # Moderate decline
-            return 25
-        else:                       # Large decline
-            return 0
+        return _ladder_value(growth_value, self._growth_table)
     
     def _normalize_article_coverage(self, total_articles: int) -> float:
         """Normalize article coverage to 0-100 scale"""
-        if total_articles >= 15:
-            return 100
-        elif total_articles >= 10:
-            return 85
-        elif total_articles >= 5:
-            return 70
-        elif total_articles >= 2:
-            return 55
-        elif total_articles >= 1:
-            return 40
-        else:
-            return 20
+        return _ladder_value(total_articles, self._coverage_table)
     
     def _normalize_sentiment_ratio(self, positive_count: int, negative_count: int) -> float:
         """Normalize positive/negative sentiment ratio to 0-100 scale"""
@@ -276,31 +280,11 @@ class DataNormalizer:
         if total == 0:
             return 50  # Neutral when no sentiment data
         
-        positive_ratio = positive_count / total
-        
-        if positive_ratio >= 0.8:
-            return 100
-        elif positive_ratio >= 0.6:
-            return 80
-        elif positive_ratio >= 0.4:
-            return 60
-        elif positive_ratio >= 0.2:
-            return 40
-        else:
-            return 20
+        return _ladder_value(positive_count / total, self._ratio_table)
     
     def _normalize_sentiment_consistency(self, volatility: float) -> float:
         """Normalize sentiment consistency (lower volatility is better)"""
-        if volatility <= 0.1:
-            return 100  # Very consistent
-        elif volatility <= 0.2:
-            return 80   # Consistent
-        elif volatility <= 0.3:
-            return 60   # Moderately consistent
-        elif volatility <= 0.5:
-            return 40   # Inconsistent
-        else:
-            return 20   # Very inconsistent
+        return _ladder_value(volatility, self._consistency_table)
     
     def normalize_value_to_range(
         self, 
@@ -323,22 +307,17 @@ class DataNormalizer:
         Returns:
             Normalized value in target range
         """
-        try:
-            if max_val == min_val:
-                return target_min
-            
-            # Clamp value to original range
-            value = max(min_val, min(max_val, value))
-            
-            # Normalize to 0-1 range
-            normalized = (value - min_val) / (max_val - min_val)
-            
-            # Scale to target range
-            return target_min + normalized * (target_max - target_min)
-            
-        except Exception as e:
-            print(f"Error normalizing value: {e}")
+        if value is None or not math.isfinite(value) or max_val == min_val:
             return target_min
+        
+        # Clamp value to original range
+        value = max(min_val, min(max_val, value))
+        
+        # Normalize to 0-1 range
+        normalized = (value - min_val) / (max_val - min_val)
+        
+        # Scale to target range
+        return target_min + normalized * (target_max - target_min)
     
     def calculate_percentile_score(self, value: float, value_list: List[float]) -> float:
         """
@@ -346,33 +325,58 @@ class DataNormalizer:
         
         Args:
             value: Value to score
-            value_list: List of values for comparison
+            value_list: List or array of values for comparison
             
         Returns:
             Percentile score (0-100)
         """
         try:
-            if not value_list or value is None:
+            if value is None or value_list is None:
                 return 50.0
             
-            # Remove None values and sort
-            clean_list = [v for v in value_list if v is not None]
-            if not clean_list:
+            universe = self._sorted_universe(value_list)
+            if universe.size == 0:
                 return 50.0
             
-            clean_list.sort()
-            
-            # Find position of value in sorted list
-            position = sum(1 for v in clean_list if v <= value)
-            percentile = (position / len(clean_list)) * 100
-            
-            return max(0, min(100, percentile))
+            # Count of values <= value, by binary search
+            position = np.searchsorted(universe, value, side='right')
+            return float(position / universe.size * 100)
             
         except Exception as e:
             print(f"Error calculating percentile: {e}")
             return 50.0
     
-    def get_score_interpretation(self, score: float) -> Dict[str, str]:
+    def calculate_percentile_scores(self, values, value_list) -> np.ndarray:
+        """
+        Calculate percentile scores of many values within the same list
+        
+        The comparison list is sorted once and every value is placed with a
+        single searchsorted call.
+        
+        Args:
+            values: Values to score (None or NaN scores 50)
+            value_list: List or array of values for comparison
+            
+        Returns:
+            Array of percentile scores (0-100)
+        """
+        values = np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+        universe = self._sorted_universe(value_list) if value_list is not None else np.empty(0)
+        if universe.size == 0:
+            return np.full(values.shape, 50.0)
+        
+        percentiles = np.searchsorted(universe, values, side='right') / universe.size * 100
+        return np.where(np.isnan(values), 50.0, percentiles)
+    
+    def _sorted_universe(self, value_list) -> np.ndarray:
+        """Sorted float array of the comparison values, without None/NaN"""
+        if isinstance(value_list, np.ndarray):
+            universe = value_list.astype(np.float64, copy=False)
+        else:
+            universe = np.array([v for v in value_list if v is not None], dtype=np.float64)
+        return np.sort(universe[~np.isnan(universe)])
+    
+    def get_score_interpretation(self, score: float) -> Mapping[str, str]:
         """
         Get human-readable interpretation of a score
         
@@ -380,40 +384,6 @@ class DataNormalizer:
             score: Score between 0-100
             
         Returns:
-            Dictionary with interpretation details
+            Shared read-only mapping with interpretation details
         """
-        if score >= 85:
-            return {
-                'grade': 'A',
-                'description': 'Excellent',
-                'color': 'green',
-                'recommendation': 'Strong Buy'
-            }
-        elif score >= 70:
-            return {
-                'grade': 'B',
-                'description': 'Good',
-                'color': 'lightgreen',
-                'recommendation': 'Buy'
-            }
-        elif score >= 55:
-            return {
-                'grade': 'C',
-                'description': 'Fair',
-                'color': 'yellow',
-                'recommendation': 'Hold'
-            }
-        elif score >= 40:
-            return {
-                'grade': 'D',
-                'description': 'Poor',
-                'color': 'orange',
-                'recommendation': 'Consider Selling'
-            }
-        else:
-            return {
-                'grade': 'F',
-                'description': 'Very Poor',
-                'color': 'red',
-                'recommendation': 'Sell'
-            }
+        return SCORE_GRADES[bisect.bisect_right(SCORE_GRADE_THRESHOLDS, score)]